@@ -0,0 +1,236 @@
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+import torch
+
+from ball_tracker import BallTracker
+from basket_utils import get_device
+from db_utils import get_match, insert_foul_in_db, insert_shot_in_db, save_team_to_db
+from frame_reader import FrameReader
+from hoop_lock import HoopLock
+from inference import BACKENDS, BatchInference, HoopRoiPolicy, load_models, open_detection_cache, release_models
+from match_analysis import MatchAnalyzer
+
+
+def run_pipeline(inference, analyzer, max_frames=None, stop_index=None):
+    """Feed inferred frames into the analyzer until the video (or the given limit) ends."""
+    frames = 0
+    while max_frames is None or frames < max_frames:
+        item = inference.next(timeout=1.0)
+        if item is None:
+            if inference.finished():
+                break
+            continue
+        decoded, detections_obj, detections_person = item
+        if stop_index is not None and decoded.index >= stop_index:
+            break
+        analyzer.process_frame(decoded.image, decoded.index, detections_obj, detections_person)
+        frames += 1
+    return frames
+
+
+def analyze_segment(video_path, team1, team2, start, end, overlap, stride, batch_size, threads, hoop_roi=False,
+                    hoop_lock=False, backend="torch", cache=True, ball_tracker=False):
+    """Analyze frames [start, end) of a video in a worker process, warming up `overlap` frames early.
+
+    Nothing is written to the DB here. Events from the warm-up part are
+    dropped since the tracking state is still cold there; events past `end`
+    are kept (marked as not owned) so a shot that straddles the boundary is
+    not lost, and the merge step deduplicates them against the next segment.
+    """
+    torch.set_num_threads(threads)
+    device = get_device()
+    model_object, model_person = load_models(device, backend)
+    analyzer = MatchAnalyzer(None, team1, team2, draw=False, write_db=False,
+                             hoop_lock=HoopLock(video_path) if hoop_lock else None,
+                             ball_tracker=BallTracker() if ball_tracker else None)
+    reader = FrameReader(video_path, capacity=4 * batch_size, stride=stride)
+    inference = BatchInference(reader, model_object, model_person, device, batch_size=batch_size,
+                               max_latency_ms=1000, roi_policy=HoopRoiPolicy(analyzer) if hoop_roi else None,
+                               hoop_lock=analyzer.hoop_lock,
+                               cache=open_detection_cache(video_path, reader.frame_count, backend,
+                                                          hoop_roi=hoop_roi, hoop_lock=hoop_lock) if cache else None)
+
+    first = max(0, start - overlap)
+    if first:
+        inference.seek(first)
+    try:
+        frames = run_pipeline(inference, analyzer, stop_index=end + overlap)
+    finally:
+        inference.close()
+        reader.release()
+        release_models(model_object, model_person)
+
+    events = [e for e in analyzer.events if e["frame"] >= start]
+    for event in events:
+        event["owned"] = event["frame"] < end
+        event["segment"] = start
+    return {"events": events, "team_colors": analyzer.team_colors, "frames": frames}
+
+
+def align_teams(events, colors, reference, team1, team2):
+    """Swap team labels of a segment whose first-seen jersey colours came out the other way round."""
+    if not all(t in colors and t in reference for t in (team1, team2)):
+        return events
+
+    def dist(a, b):
+        return np.linalg.norm(np.array(a, dtype=float) - np.array(b, dtype=float))
+
+    same = dist(colors[team1], reference[team1]) + dist(colors[team2], reference[team2])
+    swapped = dist(colors[team1], reference[team2]) + dist(colors[team2], reference[team1])
+    if swapped >= same:
+        return events
+
+    swap = {team1: team2, team2: team1}
+    for event in events:
+        event["team"] = swap.get(event["team"], event["team"])
+    return events
+
+
+def merge_segment_events(segments, dedupe_frames):
+    """Merge per-segment events, collapsing the same event detected by two neighbouring segments.
+
+    Only an event past its segment's end (not owned) can be a copy: it is
+    collapsed with an event of the same type and team from another segment
+    at most dedupe_frames away, and the owned one is kept. Two owned events
+    are always distinct.
+    """
+    events = sorted((e for seg in segments for e in seg["events"]), key=lambda e: e["frame"])
+    merged = []
+    for event in events:
+        duplicate = None
+        for kept in reversed(merged):
+            if event["frame"] - kept["frame"] > dedupe_frames:
+                break
+            if (kept["type"] == event["type"] and kept["team"] == event["team"]
+                    and kept["segment"] != event["segment"] and not (kept["owned"] and event["owned"])):
+                duplicate = kept
+                break
+
+        if duplicate is None:
+            merged.append(event)
+        elif event["owned"] and not duplicate["owned"]:
+            merged[merged.index(duplicate)] = event
+    return merged
+
+
+def analyze_match_parallel(match, workers, overlap_seconds=5.0, stride=2, batch_size=8, hoop_roi=False,
+                           hoop_lock=False, backend="torch", cache=True, ball_tracker=False):
+    """Split the video into overlapping segments and analyze them in a process pool."""
+    cap = cv2.VideoCapture(match['video_path'])
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    overlap = int(overlap_seconds * fps)
+    bounds = np.linspace(0, total, workers + 1).astype(int)
+    threads = max(1, (os.cpu_count() or workers) // workers)
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(analyze_segment, match['video_path'], match['team1'], match['team2'],
+                               int(start), int(end), overlap, stride, batch_size, threads, hoop_roi, hoop_lock,
+                               backend, cache, ball_tracker)
+                   for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        segments = [f.result() for f in futures]
+
+    reference = segments[0]["team_colors"]
+    for seg in segments[1:]:
+        align_teams(seg["events"], seg["team_colors"], reference, match['team1'], match['team2'])
+
+    # Одно и то же событие в зоне перекрытия может попасть в оба соседних сегмента;
+    # копии расходятся на несколько кадров, поэтому допуск — около секунды, а не всё перекрытие
+    events = merge_segment_events(segments, dedupe_frames=int(fps))
+    return events, reference, sum(seg["frames"] for seg in segments)
+
+
+def analyze_match(match_id, batch_size=8, max_latency_ms=1000, stride=2, max_frames=None, workers=1,
+                  hoop_roi=False, hoop_lock=False, backend="torch", cache=True, ball_tracker=False):
+    """Run detection, tracking, shot and foul logic over a match video without a display.
+
+    Events and stats are written to the DB exactly as during live viewing.
+    Returns the match row, the detected events, the number of processed
+    frames and the wall time.
+    """
+    match = get_match(match_id)
+    if not match or not match['video_path']:
+        raise ValueError(f"Матч {match_id} не найден или для него не задано видео")
+
+    start = time.perf_counter()
+    if workers > 1:
+        events, team_colors, frames = analyze_match_parallel(match, workers, stride=stride, batch_size=batch_size,
+                                                             hoop_roi=hoop_roi, hoop_lock=hoop_lock,
+                                                             backend=backend, cache=cache,
+                                                             ball_tracker=ball_tracker)
+        for team, hsv in team_colors.items():
+            save_team_to_db(team, hsv)
+        for event in events:
+            if event["type"] == "foul":
+                insert_foul_in_db(match_id, event["team"])
+            elif event["points"] and event["team"]:
+                insert_shot_in_db(match_id, event["team"], event["points"])
+        return match, events, frames, time.perf_counter() - start
+
+    device = get_device()
+    model_object, model_person = load_models(device, backend)
+    analyzer = MatchAnalyzer(match_id, match['team1'], match['team2'], draw=False,
+                             hoop_lock=HoopLock(match['video_path']) if hoop_lock else None,
+                             ball_tracker=BallTracker() if ball_tracker else None)
+    reader = FrameReader(match['video_path'], capacity=4 * batch_size, stride=stride)
+    inference = BatchInference(reader, model_object, model_person, device, batch_size=batch_size,
+                               max_latency_ms=max_latency_ms, parallel_models=True,
+                               roi_policy=HoopRoiPolicy(analyzer) if hoop_roi else None,
+                               hoop_lock=analyzer.hoop_lock,
+                               cache=open_detection_cache(match['video_path'], reader.frame_count, backend,
+                                                          hoop_roi=hoop_roi, hoop_lock=hoop_lock) if cache else None)
+
+    try:
+        frames = run_pipeline(inference, analyzer, max_frames=max_frames)
+    finally:
+        inference.close()
+        reader.release()
+        release_models(model_object, model_person)
+
+    return match, analyzer.events, frames, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Анализ записи матча без графического интерфейса")
+    parser.add_argument("--match-id", type=int, required=True, help="id матча из таблицы matches")
+    parser.add_argument("--batch-size", type=int, default=8, help="кадров в одном батче инференса")
+    parser.add_argument("--max-latency-ms", type=int, default=1000, help="максимальное ожидание заполнения батча")
+    parser.add_argument("--stride", type=int, default=2, help="анализировать каждый N-й кадр (как в просмотре)")
+    parser.add_argument("--max-frames", type=int, default=None, help="остановиться после N кадров")
+    parser.add_argument("--workers", type=int, default=1, help="процессов для параллельного анализа по сегментам")
+    parser.add_argument("--hoop-roi", action="store_true", help="искать мяч в области вокруг кольца")
+    parser.add_argument("--hoop-lock", action="store_true", help="зафиксировать положение кольца (статичная камера)")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                        help="движок инференса (модели для onnx/openvino готовит export_models.py)")
+    parser.add_argument("--ball-tracker", action="store_true",
+                        help="отслеживать мяч фильтром Калмана и достраивать пропущенные детекции")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать кэш детекций на диске")
+    args = parser.parse_args()
+
+    match, events, frames, elapsed = analyze_match(args.match_id, batch_size=args.batch_size,
+                                                   max_latency_ms=args.max_latency_ms, stride=args.stride,
+                                                   max_frames=args.max_frames, workers=args.workers,
+                                                   hoop_roi=args.hoop_roi, hoop_lock=args.hoop_lock,
+                                                   backend=args.backend, cache=not args.no_cache,
+                                                   ball_tracker=args.ball_tracker)
+
+    shots = [e for e in events if e["type"] == "shot"]
+    fouls = [e for e in events if e["type"] == "foul"]
+    score1 = sum(e["points"] for e in shots if e["team"] == match['team1'])
+    score2 = sum(e["points"] for e in shots if e["team"] == match['team2'])
+    print(f"[INFO] {match['team1']} {score1} : {score2} {match['team2']}")
+    print(f"[INFO] Бросков: {len(shots)}, попаданий: {sum(1 for e in shots if e['points'])}, фолов: {len(fouls)}")
+    print(f"[INFO] Кадров: {frames}, время: {elapsed:.1f} с, {frames / elapsed if elapsed else 0.0:.1f} кадр/с")
+
+
+if __name__ == "__main__":
+    main()
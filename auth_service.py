@@ -0,0 +1,110 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from db_utils import pool
+
+
+# Параметры хэширования паролей (scrypt по умолчанию в werkzeug: n, r, p);
+# более слабые хэши пересчитываются при успешном входе
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 15, 8, 1
+HASH_METHOD = f"scrypt:{SCRYPT_N}:{SCRYPT_R}:{SCRYPT_P}"
+
+
+def hash_password(password: str) -> str:
+    """Хэширование пароля."""
+    return generate_password_hash(password, method=HASH_METHOD)
+
+
+def check_password(hashed_password: str, plain_password: str) -> bool:
+    """Проверка пароля с хэшем."""
+    return check_password_hash(hashed_password, plain_password)
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash is weaker than HASH_METHOD: not scrypt, or scrypt with less memory or work."""
+    method, *params = hashed_password.split("$", 1)[0].split(":")
+    if method != "scrypt":
+        return True
+    try:
+        n, r, p = (int(v) for v in params) if params else (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    except ValueError:
+        return True
+    return n * r < SCRYPT_N * SCRYPT_R or n * r * p < SCRYPT_N * SCRYPT_R * SCRYPT_P
+
+
+class AuthRequest(QObject):
+    """One login or registration in flight; `finished` is delivered on the thread that created it (the GUI)."""
+
+    finished = pyqtSignal(object, str)
+
+
+class AuthService:
+    """Run user lookups and password hashing on a small worker pool instead of the Qt thread.
+
+    login() and register() connect the given slot to a new AuthRequest
+    before the job is queued, then return the request (keep a reference
+    until it finishes). Its finished signal carries (result, error): the
+    user row (or None for wrong credentials) for login, True for
+    registration, and a non-empty error text if the DB call failed. The pool bounds how many hashes run at
+    once, so a burst of attempts queues instead of starving the UI.
+    Connections come from db_utils.pool, which runs in autocommit mode.
+    """
+
+    def __init__(self, workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth")
+        self.rehashed = 0
+
+    def _submit(self, on_finished, fn, *args):
+        request = AuthRequest()
+        # Слот подключается до отправки в пул, иначе быстрый ответ придёт раньше подключения и потеряется
+        request.finished.connect(on_finished)
+
+        def run():
+            try:
+                request.finished.emit(fn(*args), "")
+            except Exception as e:
+                print(f"Ошибка при подключении к базе данных: {e}")
+                request.finished.emit(None, str(e))
+
+        self.executor.submit(run)
+        return request
+
+    def login(self, username, password, on_finished):
+        return self._submit(on_finished, self._authenticate, username, password)
+
+    def register(self, username, password, on_finished):
+        return self._submit(on_finished, self._register, username, password)
+
+    def _authenticate(self, username, password):
+        with pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+                user = cursor.fetchone()
+
+        if not user or not check_password(user['password'], password):
+            return None
+
+        if needs_rehash(user['password']):
+            # Пароль известен только сейчас: переводим старый хэш на текущие параметры
+            new_hash = hash_password(password)
+            with pool.connection() as connection:
+                with connection.cursor() as cursor:
+                    cursor.execute("UPDATE users SET password = %s WHERE id = %s", (new_hash, user['id']))
+            user['password'] = new_hash
+            self.rehashed += 1
+        return user
+
+    def _register(self, username, password):
+        hashed_password = hash_password(password)
+        with pool.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s)", (username, hashed_password))
+        return True
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+auth_service = AuthService()
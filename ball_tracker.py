@@ -0,0 +1,129 @@
+import numpy as np
+
+
+class BallTracker:
+    """Single-ball Kalman tracker that bridges short gaps in the ball detections.
+
+    The state is (x, y, vx, vy, ax, ay) in pixels per analyzed frame with a
+    constant-acceleration model; the vertical acceleration starts at the
+    gravity prior and is refined from the measurements. Each frame the
+    track is predicted one step ahead and the detection with the smallest
+    Mahalanobis distance inside the gate updates it; detections outside
+    the gate are rejected as outliers. When nothing matches, a confirmed
+    track (min_hits matches) yields its predicted position for up to
+    max_gap frames, after which the track is dropped and the next
+    detection starts a new one. A tentative track that misses while
+    other detections are present is restarted from them right away.
+    """
+
+    # 99% квантиль хи-квадрат с двумя степенями свободы
+    GATE = 9.21
+
+    def __init__(self, gravity=0.5, max_gap=8, min_hits=3, measurement_noise=3.0, process_noise=0.05):
+        self.gravity = gravity
+        self.max_gap = max_gap
+        self.min_hits = min_hits
+
+        transition = np.array([[1.0, 1.0, 0.5], [0.0, 1.0, 1.0], [0.0, 0.0, 1.0]])
+        self.F = np.kron(transition, np.eye(2))
+        self.H = np.hstack([np.eye(2), np.zeros((2, 4))])
+        self.R = np.eye(2) * measurement_noise ** 2
+        jerk = np.array([1 / 6, 1 / 2, 1.0])
+        self.Q = np.kron(np.outer(jerk, jerk), np.eye(2)) * process_noise ** 2
+
+        self.state = None
+        self.P = None
+        self.frame = None
+        self.size = (0, 0)
+        self.hits = 0
+        self.misses = 0
+
+        self.measured_frames = 0
+        self.predicted_frames = 0
+        self.rejected = 0
+
+    @property
+    def active(self):
+        return self.state is not None
+
+    def reset(self):
+        self.state = None
+        self.P = None
+        self.hits = 0
+        self.misses = 0
+
+    def _start(self, frame, detection):
+        cx, cy, w, h, _ = detection
+        self.state = np.array([cx, cy, 0.0, 0.0, 0.0, self.gravity])
+        self.P = np.diag([9.0, 9.0, 400.0, 400.0, 1.0, 1.0])
+        self.frame = frame
+        self.size = (w, h)
+        self.hits = 1
+        self.misses = 0
+
+    def _predict(self, frame):
+        for _ in range(max(0, frame - self.frame)):
+            self.state = self.F @ self.state
+            self.P = self.F @ self.P @ self.F.T + self.Q
+        self.frame = frame
+
+    def update(self, frame, detections):
+        """Feed one frame's ball detections [(cx, cy, w, h, conf)].
+
+        Returns (x, y, w, h, conf, measured) of the ball on this frame,
+        where measured=False marks a predicted position, or None when
+        there is nothing to report.
+        """
+        if not self.active:
+            if not detections:
+                return None
+            best = max(detections, key=lambda d: d[4])
+            self._start(frame, best)
+            self.measured_frames += 1
+            return best + (True,)
+
+        self._predict(frame)
+
+        best, best_d2, S = None, self.GATE, None
+        if detections:
+            S = self.H @ self.P @ self.H.T + self.R
+            S_inv = np.linalg.inv(S)
+            predicted = self.H @ self.state
+            for detection in detections:
+                residual = np.array(detection[:2], dtype=np.float64) - predicted
+                d2 = residual @ S_inv @ residual
+                if d2 < best_d2:
+                    best, best_d2 = detection, d2
+
+        if best is not None:
+            self.rejected += len(detections) - 1
+            residual = np.array(best[:2], dtype=np.float64) - self.H @ self.state
+            K = self.P @ self.H.T @ np.linalg.inv(S)
+            self.state = self.state + K @ residual
+            self.P = (np.eye(6) - K @ self.H) @ self.P
+            self.size = best[2:4]
+            self.hits += 1
+            self.misses = 0
+            self.measured_frames += 1
+            return best + (True,)
+
+        self.misses += 1
+        if self.misses > self.max_gap or (self.hits < self.min_hits and detections):
+            # Мяч потерян или трек начался с ложной детекции: следующая детекция начинает новый трек
+            self.reset()
+            return self.update(frame, detections) if detections else None
+        self.rejected += len(detections)
+        if self.hits < self.min_hits:
+            return None
+
+        self.predicted_frames += 1
+        x, y = self.state[:2]
+        w, h = self.size
+        return int(round(x)), int(round(y)), w, h, 0.0, False
+
+    def metrics(self):
+        return {
+            "measured_frames": self.measured_frames,
+            "predicted_frames": self.predicted_frames,
+            "rejected_detections": self.rejected,
+        }
@@ -16,22 +16,22 @@ def score(ball_pos, hoop_pos):
     if len(ball_pos) < 2 or len(hoop_pos) < 1:
         return False
 
-    rim_center = hoop_pos[-1][0]
-    rim_w = hoop_pos[-1][2]
-    rim_h = hoop_pos[-1][3]
-    rim_x1 = rim_center[0] - 0.4 * rim_w
-    rim_x2 = rim_center[0] + 0.4 * rim_w
-    rim_y1 = rim_center[1] - 0.3 * rim_h  # upper part of the hoop
-    rim_y2 = rim_center[1] + 0.2 * rim_h  # lower part
-
+    rim_cx, rim_cy, rim_w, rim_h = hoop_pos.box()
+    rim_x1 = rim_cx - 0.4 * rim_w
+    rim_x2 = rim_cx + 0.4 * rim_w
+    rim_y1 = rim_cy - 0.3 * rim_h  # upper part of the hoop
+    rim_y2 = rim_cy + 0.2 * rim_h  # lower part
+
+    balls = ball_pos.view()
+    xs, ys = balls["x"].tolist(), balls["y"].tolist()
     above = None
     below = None
-    for i in reversed(range(len(ball_pos))):
-        y = ball_pos[i][0][1]
+    for i in reversed(range(len(ys))):
+        y = ys[i]
         if y < rim_y1:
-            above = ball_pos[i][0]
+            above = (xs[i], y)
         elif y > rim_y2 and above:
-            below = ball_pos[i][0]
+            below = (xs[i], y)
             break
 
     if above and below:
@@ -54,9 +54,8 @@ def detect_down(ball_pos, hoop_pos):
     """Detect if the ball has dropped significantly below the hoop."""
     if not hoop_pos or not ball_pos:
         return False
-    hoop_y = hoop_pos[-1][0][1]
-    hoop_h = hoop_pos[-1][3]
-    ball_y = ball_pos[-1][0][1]
+    _, hoop_y, _, hoop_h = hoop_pos.box()
+    ball_y = ball_pos.center()[1]
 
     return ball_y > hoop_y + 0.5 * hoop_h + 5  # small buffer
 
@@ -66,9 +65,8 @@ def detect_up(ball_pos, hoop_pos):
     if not hoop_pos or not ball_pos:
         return False
 
-    hoop_x, hoop_y = hoop_pos[-1][0]
-    hoop_w, hoop_h = hoop_pos[-1][2], hoop_pos[-1][3]
-    bx, by = ball_pos[-1][0]
+    hoop_x, hoop_y, hoop_w, hoop_h = hoop_pos.box()
+    bx, by = ball_pos.center()
 
     x1 = hoop_x - 2.5 * hoop_w
     x2 = hoop_x + 2.5 * hoop_w
@@ -83,8 +81,7 @@ def in_hoop_region(center, hoop_pos):
     if not hoop_pos:
         return False
 
-    hx, hy = hoop_pos[-1][0]
-    hw, hh = hoop_pos[-1][2], hoop_pos[-1][3]
+    hx, hy, hw, hh = hoop_pos.box()
 
     x1 = hx - 0.5 * hw
     x2 = hx + 0.5 * hw
@@ -97,14 +94,10 @@ def in_hoop_region(center, hoop_pos):
 def clean_ball_pos(ball_pos, frame_count):
     """Remove outlier or inaccurate ball detections."""
     if len(ball_pos) > 1:
-        w1, h1 = ball_pos[-2][2], ball_pos[-2][3]
-        w2, h2 = ball_pos[-1][2], ball_pos[-1][3]
-
-        x1, y1 = ball_pos[-2][0]
-        x2, y2 = ball_pos[-1][0]
+        x1, y1, w1, h1 = ball_pos.box(-2)
+        x2, y2, w2, h2 = ball_pos.box(-1)
 
-        f1, f2 = ball_pos[-2][1], ball_pos[-1][1]
-        f_dif = f2 - f1
+        f_dif = ball_pos.frame(-1) - ball_pos.frame(-2)
 
         dist = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
         max_dist = 4 * math.sqrt(w1**2 + h1**2)
@@ -115,8 +108,8 @@ def clean_ball_pos(ball_pos, frame_count):
         elif (w2 * 1.4 < h2) or (h2 * 1.4 < w2):
             ball_pos.pop()
 
-    if len(ball_pos) > 0 and frame_count - ball_pos[0][1] > 30:
-        ball_pos.pop(0)
+    if len(ball_pos) > 0 and frame_count - ball_pos.frame(0) > 30:
+        ball_pos.popleft()
 
     return ball_pos
 
@@ -124,14 +117,10 @@ def clean_ball_pos(ball_pos, frame_count):
 def clean_hoop_pos(hoop_pos):
     """Remove inconsistent or jumping hoop data."""
     if len(hoop_pos) > 1:
-        x1, y1 = hoop_pos[-2][0]
-        x2, y2 = hoop_pos[-1][0]
-
-        w1, h1 = hoop_pos[-2][2], hoop_pos[-2][3]
-        w2, h2 = hoop_pos[-1][2], hoop_pos[-1][3]
+        x1, y1, w1, h1 = hoop_pos.box(-2)
+        x2, y2, w2, h2 = hoop_pos.box(-1)
 
-        f1, f2 = hoop_pos[-2][1], hoop_pos[-1][1]
-        f_dif = f2 - f1
+        f_dif = hoop_pos.frame(-1) - hoop_pos.frame(-2)
 
         dist = math.sqrt((x2 - x1)**2 + (y2 - y1)**2)
         max_dist = 0.5 * math.sqrt(w1**2 + h1**2)
@@ -143,6 +132,121 @@ def clean_hoop_pos(hoop_pos):
             hoop_pos.pop()
 
     if len(hoop_pos) > 25:
-        hoop_pos.pop(0)
+        hoop_pos.popleft()
 
     return hoop_pos
+
+
+# Vectorized counterparts: the same decisions for many trajectories or frames at once.
+# Ball trajectories are left-aligned (N, T) arrays, oldest point first, with their
+# lengths; hoops are (N, 4) arrays of (cx, cy, w, h) like PositionBuffer.box().
+
+def stack_trajectories(histories):
+    """Pad ball histories (PositionBuffer.view() arrays) into x, y (N, T) and lengths (N,)."""
+    lengths = np.array([len(h) for h in histories], dtype=np.int64)
+    width = int(lengths.max()) if len(lengths) else 0
+    x = np.zeros((len(histories), width), dtype=np.int64)
+    y = np.zeros((len(histories), width), dtype=np.int64)
+    for i, h in enumerate(histories):
+        x[i, :len(h)] = h["x"]
+        y[i, :len(h)] = h["y"]
+    return x, y, lengths
+
+
+def _hoop_columns(hoops):
+    hoops = np.asarray(hoops, dtype=np.float64).reshape(-1, 4)
+    return hoops[:, 0], hoops[:, 1], hoops[:, 2], hoops[:, 3]
+
+
+def score_batch(x, y, lengths, hoops):
+    """score() for N trajectories at once; returns a bool array (N,)."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    lengths = np.asarray(lengths)
+    rim_cx, rim_cy, rim_w, rim_h = _hoop_columns(hoops)
+    rim_x1 = rim_cx - 0.4 * rim_w
+    rim_x2 = rim_cx + 0.4 * rim_w
+    rim_y1 = rim_cy - 0.3 * rim_h
+    rim_y2 = rim_cy + 0.2 * rim_h
+
+    idx = np.arange(x.shape[1])
+    valid = idx < lengths[:, None]
+    is_above = valid & (y < rim_y1[:, None])
+    is_below = valid & (y > rim_y2[:, None])
+
+    # score() walks from the newest point back: the first older point below the rim
+    # after a point above it ends the walk, and "above" is the oldest point above the
+    # rim between the two
+    last_above = np.where(is_above, idx, -1).max(axis=1, initial=-1)
+    below_mask = is_below & (idx < last_above[:, None])
+    below_idx = np.where(below_mask, idx, -1).max(axis=1, initial=-1)
+    found = (last_above >= 0) & (below_idx >= 0)
+    above_idx = np.where(is_above & (idx > below_idx[:, None]), idx, x.shape[1]).min(axis=1, initial=x.shape[1])
+
+    result = np.zeros(len(x), dtype=bool)
+    if not found.any():
+        return result
+    rows = np.flatnonzero(found)
+    ax, ay = x[rows, above_idx[found]], y[rows, above_idx[found]]
+    bx, by = x[rows, below_idx[found]], y[rows, below_idx[found]]
+
+    # Line through the two points. For ax == bx np.polyfit returns the minimum-norm
+    # solution, and for ax == bx == 0 it raises, so score() says False
+    vertical = ax == bx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m = np.where(vertical, (ay + by) / 2 / (2 * ax), (by - ay) / (bx - ax))
+        b = np.where(vertical, (ay + by) / 4, ay - m * ax)
+    usable = ~(vertical & (ax == 0))
+
+    check_x = np.linspace(rim_x1[found], rim_x2[found], 5, axis=1)
+    pred_y = m[:, None] * check_x + b[:, None]
+    hit = (rim_y1[found, None] <= pred_y) & (pred_y <= rim_y2[found, None])
+    result[rows] = usable & hit.any(axis=1)
+    return result
+
+
+def detect_down_batch(balls, hoops):
+    """detect_down() for N (ball center, hoop) pairs; balls is (N, 2)."""
+    balls = np.asarray(balls).reshape(-1, 2)
+    _, hoop_y, _, hoop_h = _hoop_columns(hoops)
+    return balls[:, 1] > hoop_y + 0.5 * hoop_h + 5
+
+
+def detect_up_batch(balls, hoops):
+    """detect_up() for N (ball center, hoop) pairs; balls is (N, 2)."""
+    balls = np.asarray(balls).reshape(-1, 2)
+    hoop_x, hoop_y, hoop_w, hoop_h = _hoop_columns(hoops)
+    bx, by = balls[:, 0], balls[:, 1]
+    return (hoop_x - 2.5 * hoop_w < bx) & (bx < hoop_x + 2.5 * hoop_w) & (hoop_y - 2.2 * hoop_h < by) & (by < hoop_y)
+
+
+def in_hoop_region_batch(centers, hoops):
+    """in_hoop_region() for N (ball center, hoop) pairs; centers is (N, 2)."""
+    centers = np.asarray(centers).reshape(-1, 2)
+    hx, hy, hw, hh = _hoop_columns(hoops)
+    cx, cy = centers[:, 0], centers[:, 1]
+    return (hx - 0.5 * hw <= cx) & (cx <= hx + 0.5 * hw) & (hy - 0.2 * hh <= cy) & (cy <= hy + 0.3 * hh)
+
+
+def ball_outliers_batch(prev, curr):
+    """Whether clean_ball_pos() drops the newest record, for N (previous, newest) pairs of (x, y, w, h, frame) rows."""
+    prev = np.asarray(prev, dtype=np.float64).reshape(-1, 5)
+    curr = np.asarray(curr, dtype=np.float64).reshape(-1, 5)
+    dist = np.sqrt((curr[:, 0] - prev[:, 0]) ** 2 + (curr[:, 1] - prev[:, 1]) ** 2)
+    max_dist = 4 * np.sqrt(prev[:, 2] ** 2 + prev[:, 3] ** 2)
+    jump = (dist > max_dist) & (curr[:, 4] - prev[:, 4] < 5)
+    w2, h2 = curr[:, 2], curr[:, 3]
+    misshapen = (w2 * 1.4 < h2) | (h2 * 1.4 < w2)
+    return jump | misshapen
+
+
+def hoop_outliers_batch(prev, curr):
+    """How many newest records clean_hoop_pos() drops (0, 1 or 2), for N (previous, newest) pairs of (x, y, w, h, frame) rows."""
+    prev = np.asarray(prev, dtype=np.float64).reshape(-1, 5)
+    curr = np.asarray(curr, dtype=np.float64).reshape(-1, 5)
+    dist = np.sqrt((curr[:, 0] - prev[:, 0]) ** 2 + (curr[:, 1] - prev[:, 1]) ** 2)
+    max_dist = 0.5 * np.sqrt(prev[:, 2] ** 2 + prev[:, 3] ** 2)
+    jump = (dist > max_dist) & (curr[:, 4] - prev[:, 4] < 5)
+    w2, h2 = curr[:, 2], curr[:, 3]
+    misshapen = (w2 * 1.3 < h2) | (h2 * 1.3 < w2)
+    return jump.astype(np.int64) + misshapen.astype(np.int64)
@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+
+import basket_utils as bu
+from benchmarks.synthetic import hoop_buffer, random_hoop, shot, to_buffer
+from ring_buffer import PositionBuffer
+
+
+def records(*rows):
+    """PositionBuffer holding the given (x, y, frame, w, h) rows, oldest first."""
+    buffer = PositionBuffer(max(1, len(rows)))
+    for x, y, frame, w, h in rows:
+        buffer.append(x, y, frame, w, h, 1.0)
+    return buffer
+
+
+@contextmanager
+def quiet_fits():
+    """Silence what np.polyfit reports on degenerate trajectories: numpy warnings and LAPACK's DLASCL lines."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    # LAPACK пишет DLASCL прямо в дескриптор stdout, мимо sys.stdout
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+    try:
+        with warnings.catch_warnings(), np.errstate(all="ignore"):
+            warnings.simplefilter("ignore", np.exceptions.RankWarning)
+            yield
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def check(name, expected, actual):
+    expected = np.asarray(expected)
+    mismatches = np.flatnonzero(expected != np.asarray(actual))
+    status = "OK" if not len(mismatches) else f"РАСХОЖДЕНИЙ: {len(mismatches)} (первые: {mismatches[:5].tolist()})"
+    print(f"{name:<22} {len(expected):>7} случаев, сработало {int(np.count_nonzero(expected)):>6}  {status}")
+    return not len(mismatches)
+
+
+def check_trajectories(rng, count, max_length):
+    hoops = [random_hoop(rng) for _ in range(count)]
+    histories = [shot(rng, hoop, length=int(rng.integers(2, max_length + 1))) for hoop in hoops]
+    # Вертикальные траектории — вырожденный случай np.polyfit
+    for i in range(0, count, 50):
+        histories[i]["x"] = histories[i]["x"][0] if i % 1000 else 0
+
+    buffers = [to_buffer(h) for h in histories]
+    hoop_buffers = [hoop_buffer(h) for h in hoops]
+    x, y, lengths = bu.stack_trajectories(histories)
+    with quiet_fits():
+        expected = [bu.score(b, hb) for b, hb in zip(buffers, hoop_buffers)]
+    ok = check("score", expected, bu.score_batch(x, y, lengths, hoops))
+
+    # Покадровые проверки: каждая точка траектории как самая новая против своего кольца
+    frame_hoops = np.repeat(hoops, [len(h) for h in histories], axis=0)
+    centers = np.concatenate([np.stack([h["x"], h["y"]], axis=1) for h in histories])
+    pairs = [(records((cx, cy, 0, 1, 1)), hoop_buffer(hoop)) for (cx, cy), hoop in zip(centers.tolist(), frame_hoops.tolist())]
+    ok &= check("detect_up", [bu.detect_up(b, hb) for b, hb in pairs], bu.detect_up_batch(centers, frame_hoops))
+    ok &= check("detect_down", [bu.detect_down(b, hb) for b, hb in pairs], bu.detect_down_batch(centers, frame_hoops))
+    ok &= check("in_hoop_region", [bu.in_hoop_region(b.center(), hb) for b, hb in pairs],
+                bu.in_hoop_region_batch(centers, frame_hoops))
+    return ok
+
+
+def check_cleaning(rng, count):
+    prev = np.stack([rng.integers(0, 1280, count), rng.integers(0, 720, count),
+                     rng.integers(5, 90, count), rng.integers(5, 90, count), rng.integers(0, 1000, count)], axis=1)
+    curr = prev + np.stack([rng.integers(-300, 300, count), rng.integers(-300, 300, count),
+                            rng.integers(-20, 20, count), rng.integers(-20, 20, count), rng.integers(1, 10, count)], axis=1)
+    curr[:, 2:4] = np.maximum(curr[:, 2:4], 1)
+
+    ball_drops, hoop_drops = [], []
+    for (px, py, pw, ph, pf), (cx, cy, cw, ch, cf) in zip(prev.tolist(), curr.tolist()):
+        rows = (px, py, pf, pw, ph), (cx, cy, cf, cw, ch)
+        ball_drops.append(2 - len(bu.clean_ball_pos(records(*rows), cf)))
+        hoop_drops.append(2 - len(bu.clean_hoop_pos(records(*rows))))
+    ok = check("clean_ball_pos", ball_drops, bu.ball_outliers_batch(prev, curr).astype(np.int64))
+    ok &= check("clean_hoop_pos", hoop_drops, bu.hoop_outliers_batch(prev, curr))
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сверка векторизованных функций basket_utils со скалярными")
+    parser.add_argument("--trajectories", type=int, default=5000, help="Сколько синтетических бросков проверить")
+    parser.add_argument("--max-length", type=int, default=60, help="Максимальная длина истории мяча")
+    parser.add_argument("--pairs", type=int, default=20000, help="Сколько пар детекций проверить для clean_*")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ok = check_trajectories(rng, args.trajectories, args.max_length)
+    ok &= check_cleaning(rng, args.pairs)
+    print("Все решения совпадают" if ok else "Есть расхождения")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
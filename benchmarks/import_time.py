@@ -0,0 +1,56 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ("torch", "ultralytics", "cv2", "mysql.connector")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"ms": 1000.0 * elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module, runs):
+    """Import the module in `runs` fresh interpreters; return the import times (ms) and the heavy modules it pulled in."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    times, heavy = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(result["ms"])
+        heavy.update(result["heavy"])
+    return times, sorted(heavy)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время импорта main.py (запуск приложения до окна входа)")
+    parser.add_argument("--module", default="main", help="какой модуль импортировать")
+    parser.add_argument("--runs", type=int, default=5, help="сколько раз запустить интерпретатор")
+    parser.add_argument("--max-ms", type=float, default=None, help="ошибка, если медиана времени импорта больше")
+    args = parser.parse_args()
+
+    times, heavy = measure(args.module, args.runs)
+    median = statistics.median(times)
+    print(f"import {args.module}: медиана {median:.0f} мс, мин {min(times):.0f} мс, макс {max(times):.0f} мс")
+
+    ok = True
+    if heavy:
+        print(f"Загружены тяжёлые модули: {', '.join(heavy)}")
+        ok = False
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"Медиана превышает порог {args.max_ms:.0f} мс")
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
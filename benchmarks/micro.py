@@ -0,0 +1,185 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import warnings
+
+import numpy as np
+
+import basket_utils as bu
+from benchmarks import synthetic
+from match_analysis import MatchAnalyzer
+from ring_buffer import PositionBuffer
+from tracker import PlayerTracker
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA = os.path.join(HERE, "data", "trajectories.npz")
+RESULTS_DIR = os.path.join(HERE, "results")
+
+
+def time_calls(fn, items, repeats):
+    """Call fn(item) for every item `repeats` times; return per-call times (µs) of each pass."""
+    passes = []
+    for _ in range(repeats):
+        batch = items() if callable(items) else items
+        start = time.perf_counter_ns()
+        for item in batch:
+            fn(item)
+        passes.append((time.perf_counter_ns() - start) / 1000.0 / max(1, len(batch)))
+    return passes
+
+
+def hoop_history(rng, hoop, length):
+    """A PositionBuffer of `length` hoop detections jittering around the given hoop."""
+    cx, cy, w, h = hoop
+    buffer = PositionBuffer(64)
+    for frame in range(length):
+        buffer.append(int(cx + rng.normal(0, 2)), int(cy + rng.normal(0, 2)), frame,
+                      int(w + rng.normal(0, 1)), int(h + rng.normal(0, 1)), 0.9)
+    return buffer
+
+
+def analyzer_for(history, hoop):
+    analyzer = MatchAnalyzer(None, "A", "B", draw=False, write_db=False)
+    analyzer.ball_pos = synthetic.to_buffer(history)
+    analyzer.hoop_pos = synthetic.hoop_buffer(hoop)
+    return analyzer
+
+
+def run(recorded, repeats, players_per_team, seed):
+    rng = np.random.default_rng(seed)
+    results = {}
+
+    def add(name, passes, calls):
+        results[name] = {
+            "median_us": float(np.median(passes)),
+            "min_us": float(np.min(passes)),
+            "calls": calls,
+        }
+        print(f"{name:<36} {results[name]['median_us']:>10.2f} мкс (мин {results[name]['min_us']:.2f}), вызовов {calls}")
+
+    for length, shots in sorted(recorded.items()):
+        shots = [(h, hoop) for h, hoop in shots if len(h)]
+        pairs = [(synthetic.to_buffer(h), synthetic.hoop_buffer(hoop)) for h, hoop in shots]
+        last = max(h["frame"][-1] for h, _ in shots)
+
+        add(f"score[{length}]", time_calls(lambda p: bu.score(*p), pairs, repeats), len(pairs))
+        add(f"detect_up[{length}]", time_calls(lambda p: bu.detect_up(*p), pairs, repeats), len(pairs))
+        add(f"detect_down[{length}]", time_calls(lambda p: bu.detect_down(*p), pairs, repeats), len(pairs))
+        centers = [(b.center(), hb) for b, hb in pairs]
+        add(f"in_hoop_region[{length}]", time_calls(lambda p: bu.in_hoop_region(*p), centers, repeats),
+            len(centers))
+
+        # clean_* меняют буфер, поэтому каждый проход получает свежие копии
+        add(f"clean_ball_pos[{length}]",
+            time_calls(lambda b: bu.clean_ball_pos(b, last), lambda: [synthetic.to_buffer(h) for h, _ in shots],
+                       repeats), len(shots))
+        hoops = [hoop_history(rng, hoop, min(length, 30)) for _, hoop in shots]
+        add(f"clean_hoop_pos[{length}]",
+            time_calls(bu.clean_hoop_pos, lambda: [synthetic.to_buffer(hb.view().copy(), 64) for hb in hoops],
+                       repeats), len(hoops))
+
+        analyzers = [analyzer_for(h, hoop) for h, hoop in shots]
+        add(f"improved_score_detection[{length}]",
+            time_calls(MatchAnalyzer.improved_score_detection, analyzers, repeats), len(analyzers))
+        add(f"analyze_trajectory[{length}]",
+            time_calls(MatchAnalyzer.analyze_trajectory, analyzers, repeats), len(analyzers))
+
+        team1, team2 = synthetic.players(rng, players_per_team, 1)[0], synthetic.players(rng, players_per_team, 1)[0]
+        for analyzer in analyzers:
+            analyzer.tracked_players_team1 = {i + 1: (c, color) for i, (c, _, color) in enumerate(team1)}
+            analyzer.tracked_players_team2 = {i + 1: (c, color) for i, (c, _, color) in enumerate(team2)}
+        add(f"determine_scoring_team[{length}]",
+            time_calls(lambda a: a.determine_scoring_team(a.ball_pos.center()), analyzers, repeats), len(analyzers))
+
+    # Трекинг игроков: два трекера на кадр, как в MatchAnalyzer.process_frame
+    frames = 300
+    frames1 = synthetic.players(rng, players_per_team, frames)
+    frames2 = synthetic.players(rng, players_per_team, frames)
+    passes = []
+    for _ in range(repeats):
+        tracker1, tracker2 = PlayerTracker(), PlayerTracker()
+        start = time.perf_counter_ns()
+        for detected1, detected2 in zip(frames1, frames2):
+            tracker1.update(detected1)
+            tracker2.update(detected2)
+        passes.append((time.perf_counter_ns() - start) / 1000.0 / frames)
+    add(f"track_players[{players_per_team}x2]", passes, frames)
+    return results
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(HERE),
+                             capture_output=True, text=True, check=True)
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline_path, threshold):
+    """Print the change against a baseline JSON; return False if anything got slower than the threshold."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nСравнение с {baseline_path} (коммит {baseline.get('commit', '?')}):")
+    ok = True
+    for name, current in results.items():
+        old = baseline["results"].get(name)
+        if not old:
+            continue
+        ratio = current["median_us"] / old["median_us"] if old["median_us"] else float("inf")
+        slower = ratio > 1 + threshold
+        ok &= not slower
+        print(f"{name:<36} {old['median_us']:>10.2f} -> {current['median_us']:>10.2f} мкс  x{ratio:.2f}"
+              f"{'  МЕДЛЕННЕЕ' if slower else ''}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки basket_utils и анализа MatchAnalyzer")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="записанные синтетические траектории (.npz)")
+    parser.add_argument("--record", action="store_true", help="перезаписать файл траекторий")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=7, help="проходов по всем траекториям")
+    parser.add_argument("--players", type=int, default=5, help="игроков в каждой команде")
+    parser.add_argument("--output", default=None, help="куда сохранить JSON (по умолчанию results/micro-<коммит>.json)")
+    parser.add_argument("--compare", default=None, help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2, help="допустимое замедление при сравнении (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.record or not os.path.exists(args.data):
+        os.makedirs(os.path.dirname(args.data), exist_ok=True)
+        synthetic.record(args.data, seed=args.seed)
+        print(f"Траектории записаны в {args.data}")
+
+    # np.polyfit предупреждает на вырожденных траекториях, это не влияет на замер
+    warnings.simplefilter("ignore", np.exceptions.RankWarning)
+    results = run(synthetic.load(args.data), args.repeats, args.players, args.seed)
+
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "data": os.path.relpath(args.data, os.path.dirname(HERE)),
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"micro-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Результаты сохранены в {output}")
+
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+# Кадры рисуются в QPixmap без окна, поэтому Qt запускается без дисплея
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import torch
+from PyQt5.QtWidgets import QApplication
+
+from ball_tracker import BallTracker
+from benchmarks.micro import git_commit
+from display import FrameScaler, render_frame
+from frame_reader import FrameReader
+from hoop_lock import HoopLock
+from inference import BACKENDS, BatchInference, HoopRoiPolicy, load_models, open_detection_cache, release_models
+from match_analysis import MatchAnalyzer
+from stage_timer import StageTimer
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_VIDEO = os.path.join(os.path.dirname(HERE), "model", "video_test_1.mp4")
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдаёт килобайты, macOS — байты
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run(args):
+    """Drive the MatchViewer pipeline (decode, inference, analysis, overlay, Qt) over the video headlessly."""
+    device = 'cuda' if torch.cuda.is_available() else 'cpu'
+    timer = StageTimer()
+    model_object, model_person = load_models(device, args.backend)
+    analyzer = MatchAnalyzer(None, "Team A", "Team B", write_db=False,
+                             hoop_lock=HoopLock(args.video) if args.hoop_lock else None,
+                             ball_tracker=BallTracker() if args.ball_tracker else None, timer=timer)
+    reader = FrameReader(args.video, capacity=32, stride=args.stride, timer=timer)
+    inference = BatchInference(reader, model_object, model_person, device, batch_size=args.batch_size,
+                               max_latency_ms=args.max_latency_ms, parallel_models=not args.sequential_models,
+                               roi_policy=HoopRoiPolicy(analyzer) if args.hoop_roi else None,
+                               hoop_lock=analyzer.hoop_lock,
+                               cache=open_detection_cache(args.video, reader.frame_count, args.backend,
+                                                          hoop_roi=args.hoop_roi, hoop_lock=args.hoop_lock)
+                               if args.cache else None, timer=timer)
+    scaler = FrameScaler()
+
+    frames = 0
+    warmup = None
+    start = None
+    try:
+        # Замер начинается и заканчивается на границе батча: каждый этап считает одни и те же кадры
+        while start is None or frames - warmup < args.frames or inference.pending:
+            if start is None and frames >= args.warmup and not inference.pending:
+                # Прогрев (загрузка весов, первые батчи) в статистику не входит
+                timer.clear()
+                warmup, start = frames, time.perf_counter()
+            item = inference.next(timeout=1.0)
+            if item is None:
+                if inference.finished():
+                    break
+                continue
+            decoded, detections_obj, detections_person = item
+            analyzer.process_frame(decoded.image, decoded.index, detections_obj, detections_person)
+            render_frame(scaler, decoded.image, analyzer.overlay, args.width, args.height, timer)
+            frames += 1
+    finally:
+        inference.close()
+        reader.release()
+        release_models(model_object, model_person)
+
+    measured = frames - warmup if start is not None else 0
+    elapsed = time.perf_counter() - start if start is not None else 0.0
+    return {
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "device": device,
+        "settings": {
+            "video": os.path.basename(args.video),
+            "backend": args.backend,
+            "batch_size": args.batch_size,
+            "max_latency_ms": args.max_latency_ms,
+            "parallel_models": not args.sequential_models,
+            "stride": args.stride,
+            "hoop_roi": args.hoop_roi,
+            "hoop_lock": args.hoop_lock,
+            "ball_tracker": args.ball_tracker,
+            "cache": args.cache,
+            "display": [args.width, args.height],
+        },
+        "frames": measured,
+        "seconds": elapsed,
+        "fps": measured / elapsed if elapsed else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": timer.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сквозной бенчмарк конвейера просмотра матча по этапам")
+    parser.add_argument("--video", default=DEFAULT_VIDEO)
+    parser.add_argument("--frames", type=int, default=300, help="сколько кадров замерить")
+    parser.add_argument("--warmup", type=int, default=10, help="кадров прогрева, не входящих в статистику")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--max-latency-ms", type=int, default=0)
+    parser.add_argument("--sequential-models", action="store_true", help="запускать модели по очереди")
+    parser.add_argument("--stride", type=int, default=2, help="анализировать каждый N-й кадр (как в просмотре)")
+    parser.add_argument("--hoop-roi", action="store_true")
+    parser.add_argument("--hoop-lock", action="store_true")
+    parser.add_argument("--ball-tracker", action="store_true")
+    parser.add_argument("--cache", action="store_true", help="брать детекции из кэша на диске")
+    parser.add_argument("--width", type=int, default=1280, help="ширина области показа")
+    parser.add_argument("--height", type=int, default=720, help="высота области показа")
+    parser.add_argument("--output", default=None,
+                        help="куда сохранить JSON (по умолчанию results/pipeline-<backend>-<коммит>.json)")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    report = run(args)
+
+    print(f"{'этап':<14} {'p50':>8} {'p95':>8} {'p99':>8} {'кадров':>8}  (мс)")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<14} {stats['p50']:>8.2f} {stats['p95']:>8.2f} {stats['p99']:>8.2f} {stats['count']:>8}")
+    rss = report["peak_rss_mb"]
+    print(f"Кадров: {report['frames']}, {report['fps']:.1f} кадр/с, пик памяти: "
+          f"{f'{rss:.0f} МБ' if rss is not None else 'н/д'}, устройство: {report['device']}")
+
+    output = args.output or os.path.join(HERE, "results", f"pipeline-{args.backend}-{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Результаты сохранены в {output}")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import numpy as np
+
+from ring_buffer import POSITION_DTYPE, PositionBuffer
+
+
+def random_hoop(rng, frame_w=1280, frame_h=720):
+    """(cx, cy, w, h) of a hoop somewhere in the upper half of the frame."""
+    w = int(rng.integers(30, 90))
+    h = int(w * rng.uniform(0.6, 0.9))
+    return int(rng.integers(w, frame_w - w)), int(rng.integers(h + 40, frame_h // 2)), w, h
+
+
+def shot(rng, hoop, length=30, first_frame=0, gravity=0.9, miss_rate=0.1, outlier_rate=0.03):
+    """A ball history (POSITION_DTYPE array, oldest first) of one shot at the hoop."""
+    cx, cy, w, h = hoop
+    # Точка, куда летит мяч: в кольцо или мимо него
+    target_x = cx + rng.normal(0, w * 0.6)
+    target_y = cy + rng.normal(0, h * 0.3)
+    start_x = target_x + rng.choice([-1, 1]) * rng.uniform(80, 500)
+    start_y = target_y + rng.uniform(50, 300)
+    flight = rng.integers(length // 2, length)
+
+    t = np.arange(length, dtype=np.float64)
+    vx = (target_x - start_x) / flight
+    vy = (target_y - start_y - 0.5 * gravity * flight ** 2) / flight
+    x = start_x + vx * t + rng.normal(0, 1.5, length)
+    y = start_y + vy * t + 0.5 * gravity * t ** 2 + rng.normal(0, 1.5, length)
+
+    size = rng.uniform(12, 24)
+    bw = np.full(length, size) + rng.normal(0, 1, length)
+    bh = bw + rng.normal(0, 1, length)
+    outliers = rng.random(length) < outlier_rate
+    x[outliers] = rng.uniform(0, 1280, outliers.sum())
+    y[outliers] = rng.uniform(0, 720, outliers.sum())
+    bh[outliers] *= rng.uniform(0.5, 2.0, outliers.sum())
+
+    keep = rng.random(length) >= miss_rate
+    history = np.zeros(int(keep.sum()), dtype=POSITION_DTYPE)
+    history["x"] = np.round(x[keep])
+    history["y"] = np.round(y[keep])
+    history["frame"] = first_frame + np.flatnonzero(keep)
+    history["w"] = np.maximum(1, np.round(bw[keep]))
+    history["h"] = np.maximum(1, np.round(bh[keep]))
+    history["conf"] = rng.uniform(0.15, 1.0, int(keep.sum()))
+    history["measured"] = True
+    return history
+
+
+def to_buffer(history, capacity=128):
+    """Load a POSITION_DTYPE array into a PositionBuffer, as the analyzer would have appended it."""
+    buffer = PositionBuffer(capacity)
+    for record in history.tolist():
+        buffer.append(*record)
+    return buffer
+
+
+def hoop_buffer(hoop, frame=0):
+    cx, cy, w, h = hoop
+    buffer = PositionBuffer(64)
+    buffer.append(cx, cy, frame, w, h, 1.0)
+    return buffer
+
+
+def players(rng, count, frames, frame_w=1280, frame_h=720, step=6.0):
+    """Per-frame person detections [(center, bbox, color)] of `count` players walking around the court."""
+    pos = np.stack([rng.uniform(0.1 * frame_w, 0.9 * frame_w, count),
+                    rng.uniform(0.45 * frame_h, 0.95 * frame_h, count)], axis=1)
+    size = np.stack([rng.uniform(50, 90, count), rng.uniform(140, 220, count)], axis=1)
+    out = []
+    for _ in range(frames):
+        pos += rng.normal(0, step, pos.shape)
+        pos[:, 0] = np.clip(pos[:, 0], 0.05 * frame_w, 0.95 * frame_w)
+        pos[:, 1] = np.clip(pos[:, 1], 0.4 * frame_h, frame_h)
+        boxes = np.round(np.concatenate([pos - size / 2, pos + size / 2], axis=1)).astype(int)
+        out.append([(((x1 + x2) // 2, (y1 + y2) // 2), (x1, y1, x2, y2), (0, 140, 255))
+                    for x1, y1, x2, y2 in boxes.tolist()])
+    return out
+
+
+def record(path, seed=0, count=200, lengths=(10, 30, 60)):
+    """Generate `count` shots per history length and save them with their hoops to an .npz file."""
+    rng = np.random.default_rng(seed)
+    arrays = {}
+    for length in lengths:
+        hoops = [random_hoop(rng) for _ in range(count)]
+        histories = [shot(rng, hoop, length=length) for hoop in hoops]
+        arrays[f"hoops_{length}"] = np.array(hoops)
+        arrays[f"sizes_{length}"] = np.array([len(h) for h in histories])
+        arrays[f"shots_{length}"] = np.concatenate(histories)
+    np.savez_compressed(path, seed=seed, lengths=np.array(lengths), **arrays)
+
+
+def load(path):
+    """{length: [(history, hoop), ...]} from a file written by record()."""
+    data = np.load(path)
+    recorded = {}
+    for length in data["lengths"].tolist():
+        offsets = np.concatenate([[0], np.cumsum(data[f"sizes_{length}"])])
+        shots = data[f"shots_{length}"]
+        recorded[length] = [(shots[a:b], tuple(hoop)) for a, b, hoop
+                            in zip(offsets[:-1], offsets[1:], data[f"hoops_{length}"].tolist())]
+    return recorded
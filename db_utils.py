@@ -0,0 +1,282 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+import pymysql
+
+
+db_user = 'root'
+db_pass = 'root'
+
+
+class ConnectionPool:
+    """Up to `size` pymysql connections reused across calls, safe to share between worker threads.
+
+    connection() hands out an idle connection (pinged and reconnected if
+    the server dropped it) or opens a new one while under the limit,
+    otherwise waits for one to be returned. A connection whose block
+    raised is closed instead of going back to the pool. Open it with
+    autocommit=True so an idle connection never keeps a transaction (and
+    its REPEATABLE READ snapshot) from the previous caller.
+    """
+
+    def __init__(self, size=4, **params):
+        self.size = size
+        self.params = params
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.opened = 0
+
+    def _checkout(self):
+        try:
+            connection = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                can_open = self.opened < self.size
+                if can_open:
+                    self.opened += 1
+            if not can_open:
+                connection = self.idle.get()
+            else:
+                try:
+                    return pymysql.connect(**self.params)
+                except Exception:
+                    with self.lock:
+                        self.opened -= 1
+                    raise
+        try:
+            connection.ping(reconnect=True)
+        except Exception:
+            self._discard(connection)
+            raise
+        return connection
+
+    def _discard(self, connection):
+        with self.lock:
+            self.opened -= 1
+        try:
+            connection.close()
+        except pymysql.err.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        connection = self._checkout()
+        try:
+            yield connection
+        except Exception:
+            self._discard(connection)
+            raise
+        self.idle.put(connection)
+
+
+pool = ConnectionPool(host='localhost', user=db_user, password=db_pass, db='basketball_db', port=3307,
+                      charset='utf8mb4', cursorclass=pymysql.cursors.DictCursor, autocommit=True)
+
+
+def get_match(match_id):
+    """Прочитать видео и названия команд матча."""
+    connection = pymysql.connect(
+        host='localhost', user=db_user, password=db_pass, db='basketball_db', port=3307,
+        charset='utf8mb4', cursorclass=pymysql.cursors.DictCursor
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT video_path, team1, team2 FROM matches WHERE id = %s", (match_id,))
+            return cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def save_team_to_db(name, hsv):
+    connection = pymysql.connect(
+        host='localhost', user=db_user, password=db_pass, db='basketball_db', port=3307,
+        charset='utf8mb4', cursorclass=pymysql.cursors.DictCursor
+    )
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT * FROM teams WHERE name = %s", (name,))
+            if not cursor.fetchone():
+                cursor.execute("INSERT INTO teams (name, hsv_h, hsv_s, hsv_v) VALUES (%s, %s, %s, %s)",
+                               (name, hsv[0], hsv[1], hsv[2]))
+                connection.commit()
+                print(f"[DB] Команда '{name}' добавлена с HSV: {hsv}")
+    finally:
+        connection.close()
+
+
+
+def insert_shot_in_db(match_id, team_name, points):
+    import mysql.connector
+    conn = None
+    cursor = None
+    try:
+        conn = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            port=3307,
+            password="root",
+            database="basketball_db"
+        )
+        cursor = conn.cursor()
+
+        points_int = int(points)
+
+        
+        cursor.execute("""
+            SELECT id FROM teams WHERE LOWER(TRIM(name)) = LOWER(TRIM(%s))
+        """, (team_name,))
+        team = cursor.fetchone()
+        if not team:
+            print(f"[WARNING] Команда с названием '{team_name}' не найдена.")
+            return None
+        team_id = team[0]
+
+        
+        cursor.execute("""
+            INSERT INTO events (team_id, match_id, event_type, points)
+            VALUES (%s, %s, 'shot', %s)
+        """, (team_id, match_id, points_int))
+
+        
+        cursor.execute("SELECT team1, team2 FROM matches WHERE id = %s", (match_id,))
+        teams = cursor.fetchone()
+        if not teams:
+            print("[ERROR] Матч не найден в базе.")
+            conn.rollback()
+            return None
+        team1, team2 = teams
+
+        
+        cursor.execute("SELECT 1 FROM stats WHERE match_id = %s", (match_id,))
+        exists = cursor.fetchone()
+        if not exists:
+            cursor.execute("""
+                INSERT INTO stats (match_id, team1_points, team2_points,
+                                   team1_twos, team2_twos, team1_threes, team2_threes)
+                VALUES (%s, 0, 0, 0, 0, 0, 0)
+            """, (match_id,))
+
+        
+        if team_name.lower().strip() == team1.lower().strip():
+            cursor.execute("""
+                UPDATE stats 
+                SET team1_points = team1_points + %s,
+                    team1_twos = team1_twos + %s,
+                    team1_threes = team1_threes + %s
+                WHERE match_id = %s
+            """, (points_int, 1 if points_int == 2 else 0, 1 if points_int == 3 else 0, match_id))
+
+        elif team_name.lower().strip() == team2.lower().strip():
+            cursor.execute("""
+                UPDATE stats 
+                SET team2_points = team2_points + %s,
+                    team2_twos = team2_twos + %s,
+                    team2_threes = team2_threes + %s
+                WHERE match_id = %s
+            """, (points_int, 1 if points_int == 2 else 0, 1 if points_int == 3 else 0, match_id))
+
+        else:
+            print("[WARNING] Команда не принадлежит ни одной из команд матча.")
+
+        conn.commit()
+        print(f"[INFO] Бросок команды '{team_name}' ({points_int} очков) записан, очки обновлены.")
+        return team_id
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Ошибка записи в БД: {err}")
+        if conn:
+            conn.rollback()
+        return None
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+def insert_foul_in_db(match_id, team_name, foul_time=None):
+    import mysql.connector
+    import datetime
+    conn = None
+    cursor = None
+    try:
+        conn = mysql.connector.connect(
+            host="localhost",
+            user="root",
+            port = 3307,
+            password="root",
+            database="basketball_db"
+        )
+        cursor = conn.cursor()
+
+        
+        cursor.execute("""
+            SELECT id FROM teams WHERE LOWER(TRIM(name)) = LOWER(TRIM(%s))
+        """, (team_name,))
+        team = cursor.fetchone()
+        if not team:
+            print(f"[WARNING] Команда с названием '{team_name}' не найдена.")
+            return None
+        team_id = team[0]
+
+        
+        cursor.execute("SELECT team1, team2 FROM matches WHERE id = %s", (match_id,))
+        teams = cursor.fetchone()
+        if not teams:
+            print("[ERROR] Матч не найден в базе.")
+            conn.rollback()
+            return None
+        team1, team2 = teams
+
+        
+        cursor.execute("SELECT 1 FROM stats WHERE match_id = %s", (match_id,))
+        exists = cursor.fetchone()
+        if not exists:
+            cursor.execute("""
+                INSERT INTO stats (match_id, team1_fouls, team2_fouls)
+                VALUES (%s, 0, 0)
+            """, (match_id,))
+
+        
+        if foul_time is None:
+            foul_time = datetime.datetime.now()
+        cursor.execute("""
+            INSERT INTO events (team_id, match_id, event_type, event_time)
+            VALUES (%s, %s, 'foul', %s)
+        """, (team_id, match_id, foul_time))
+
+        
+        if team_name.lower().strip() == team1.lower().strip():
+            cursor.execute("""
+                UPDATE stats 
+                SET team1_fouls = team1_fouls + 1
+                WHERE match_id = %s
+            """, (match_id,))
+        elif team_name.lower().strip() == team2.lower().strip():
+            cursor.execute("""
+                UPDATE stats 
+                SET team2_fouls = team2_fouls + 1
+                WHERE match_id = %s
+            """, (match_id,))
+        else:
+            print("[WARNING] Команда не принадлежит ни одной из команд матча.")
+            conn.rollback()
+            return None
+
+        conn.commit()
+        print(f"[INFO] Фол команды '{team_name}' записан, статистика обновлена.")
+        return team_id
+
+    except mysql.connector.Error as err:
+        print(f"[ERROR] Ошибка записи в БД: {err}")
+        if conn:
+            conn.rollback()
+        return None
+
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+CHUNK = 1 << 20
+ROW = 6  # x1, y1, x2, y2, conf, cls
+# Версия раскладки index.npy; входит в ключ, чтобы старые кэши не читались по-новому
+FORMAT = 2
+
+
+def video_fingerprint(path):
+    """Cheap identity of a video file: its size plus a hash of the first and last megabyte."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha1(str(size).encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(CHUNK))
+        if size > 2 * CHUNK:
+            f.seek(-CHUNK, os.SEEK_END)
+            digest.update(f.read(CHUNK))
+    return digest.hexdigest()
+
+
+def weights_fingerprint(path):
+    """Hash of a weights file, or of every file in an exported model directory."""
+    digest = hashlib.sha1()
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+    for name in files:
+        with open(name, "rb") as f:
+            for block in iter(lambda: f.read(CHUNK), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class DetectionCache:
+    """Per-video on-disk store of model detections, so a frame is only ever inferred once.
+
+    Lives in <video>.detcache/<key>/, where the key covers the video
+    contents, the weights and the inference settings. Detections of both
+    models are appended as float32 rows of x1, y1, x2, y2, conf, cls to
+    boxes.f32; index.npy holds, per frame, the first row and the row count
+    of the ball/hoop and person detections (-1 while the frame is not
+    cached) and whether the ball/hoop model ran on the ball class only. Both files are memory-mapped, and appends are safe across the
+    segment worker processes of the offline analyzer.
+    """
+
+    def __init__(self, video_path, frame_count, weights, settings):
+        key = hashlib.sha1(json.dumps({
+            "format": FORMAT,
+            "video": video_fingerprint(video_path),
+            "weights": [weights_fingerprint(w) for w in weights],
+            "settings": settings,
+        }, sort_keys=True).encode()).hexdigest()[:16]
+        self.dir = os.path.join(f"{video_path}.detcache", key)
+        os.makedirs(self.dir, exist_ok=True)
+
+        index_path = os.path.join(self.dir, "index.npy")
+        if not os.path.exists(index_path):
+            tmp = f"{index_path}.{os.getpid()}.tmp"
+            index = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.int64, shape=(frame_count, 5))
+            index[:] = -1
+            index.flush()
+            del index
+            try:
+                # link не перезаписывает индекс, уже созданный другим процессом
+                os.link(tmp, index_path)
+            except FileExistsError:
+                pass
+            os.remove(tmp)
+        self.index = np.load(index_path, mmap_mode="r+")
+
+        self.boxes_path = os.path.join(self.dir, "boxes.f32")
+        self.fd = os.open(self.boxes_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0))
+        self.boxes = np.zeros((0, ROW), dtype=np.float32)
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def cached_frames(self):
+        return int(np.count_nonzero(self.index[:, 1] >= 0))
+
+    def complete(self):
+        return self.cached_frames() == len(self.index)
+
+    def _rows(self, start, count):
+        if start + count > len(self.boxes):
+            rows = os.path.getsize(self.boxes_path) // (4 * ROW)
+            self.boxes = np.memmap(self.boxes_path, dtype=np.float32, mode="r", shape=(rows, ROW)) \
+                if rows else np.zeros((0, ROW), dtype=np.float32)
+        return np.array(self.boxes[start:start + count])
+
+    def get(self, frame_index, need_hoop=False):
+        """Return (object_detections, person_detections, ball_only) of a frame, or None if it is not cached.
+
+        With need_hoop=True a frame cached from a ball-only run counts as not cached.
+        """
+        if not 0 <= frame_index < len(self.index):
+            return None
+        obj_start, obj_count, person_start, person_count, ball_only = self.index[frame_index]
+        if person_count < 0 or (need_hoop and ball_only):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._rows(obj_start, obj_count), self._rows(person_start, person_count), bool(ball_only)
+
+    def put(self, frame_index, detections_obj, detections_person, ball_only=False):
+        if not 0 <= frame_index < len(self.index):
+            return
+        rows = np.concatenate([np.asarray(detections_obj, dtype=np.float32).reshape(-1, ROW),
+                               np.asarray(detections_person, dtype=np.float32).reshape(-1, ROW)])
+        data = rows.tobytes()
+        os.write(self.fd, data)
+        start = (os.lseek(self.fd, 0, os.SEEK_CUR) - len(data)) // (4 * ROW)
+        obj_count = len(detections_obj)
+        # Строка индекса пишется последней: кадр считается закэшированным только с полными данными
+        self.index[frame_index] = (start, obj_count, start + obj_count, len(rows) - obj_count, int(ball_only))
+
+    def close(self):
+        self.index.flush()
+        os.close(self.fd)
+        self.boxes = np.zeros((0, ROW), dtype=np.float32)
@@ -0,0 +1,100 @@
+import time
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QPointF, QRectF, Qt
+from PyQt5.QtGui import QColor, QFont, QFontMetricsF, QImage, QPainter, QPen, QPixmap
+
+from overlay import Circle, Rect
+
+
+# Высота текста cv2.FONT_HERSHEY_SIMPLEX при масштабе 1 соответствует шрифту примерно в 30 px
+FONT_PX_PER_SCALE = 30
+
+
+class FrameScaler:
+    """Fit BGR frames into a widget-sized buffer that is reused across frames.
+
+    The frame is scaled once to the display size with a fast interpolator
+    and wrapped as a BGR888 QImage without a colour conversion, so Qt only
+    copies the already small image when it builds the pixmap.
+    """
+
+    def __init__(self, interpolation=cv2.INTER_LINEAR):
+        self.interpolation = interpolation
+        self.buffer = None
+
+    def fit_size(self, frame_w, frame_h, width, height):
+        scale = min(width / frame_w, height / frame_h)
+        return max(1, int(frame_w * scale)), max(1, int(frame_h * scale))
+
+    def to_qimage(self, frame, width, height):
+        """Return a QImage of the frame scaled to fit width x height; it shares memory with the buffer (or the frame)."""
+        w, h = self.fit_size(frame.shape[1], frame.shape[0], width, height)
+        if (w, h) == (frame.shape[1], frame.shape[0]):
+            image = np.ascontiguousarray(frame)
+        else:
+            if self.buffer is None or self.buffer.shape[:2] != (h, w):
+                self.buffer = np.empty((h, w, 3), dtype=np.uint8)
+            image = cv2.resize(frame, (w, h), dst=self.buffer, interpolation=self.interpolation)
+        return QImage(image.data, w, h, image.strides[0], QImage.Format_BGR888)
+
+
+def _color(bgr, alpha=1.0):
+    return QColor(int(bgr[2]), int(bgr[1]), int(bgr[0]), int(255 * alpha))
+
+
+def paint_overlay(painter, overlay, width, height):
+    """Paint an Overlay recorded in source-frame coordinates onto a width x height display image."""
+    if not overlay.items or overlay.frame_size is None:
+        return
+    sx, sy = width / overlay.frame_size[0], height / overlay.frame_size[1]
+    scale = min(sx, sy)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setRenderHint(QPainter.TextAntialiasing)
+
+    for item in overlay.items:
+        if isinstance(item, Rect):
+            rect = QRectF(item.x1 * sx, item.y1 * sy, (item.x2 - item.x1) * sx, (item.y2 - item.y1) * sy)
+            if item.width < 0:
+                painter.fillRect(rect, _color(item.color, item.alpha))
+            else:
+                painter.setPen(QPen(_color(item.color, item.alpha), max(1.0, item.width * scale)))
+                painter.setBrush(Qt.NoBrush)
+                painter.drawRect(rect)
+        elif isinstance(item, Circle):
+            painter.setPen(QPen(_color(item.color), max(1.0, item.width * scale)))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawEllipse(QPointF(item.x * sx, item.y * sy), item.radius * scale, item.radius * scale)
+        else:
+            font = QFont("Arial")
+            font.setPixelSize(max(1, round(FONT_PX_PER_SCALE * item.scale * scale)))
+            font.setBold(item.thickness >= 2)
+            painter.setFont(font)
+            painter.setPen(_color(item.color))
+            x = item.x * sx
+            if item.centered:
+                x -= QFontMetricsF(font).horizontalAdvance(item.text) / 2
+            painter.drawText(QPointF(x, item.y * sy), item.text)
+
+
+def render_frame(scaler, frame, overlay, width, height, timer=None):
+    """Scale a frame into a QPixmap fitting width x height and paint the overlay (if any) on top.
+
+    With a StageTimer the scaling and pixmap upload are recorded under
+    "qt" and the overlay painting under "overlay".
+    """
+    start = time.perf_counter()
+    # Масштабируем один раз в переиспользуемый буфер, без перевода BGR -> RGB
+    pixmap = QPixmap.fromImage(scaler.to_qimage(frame, width, height))
+    if timer:
+        start = timer.since("qt", start)
+    if overlay is not None:
+        # Разметка рисуется векторно поверх уже масштабированного кадра, исходный кадр не меняется
+        painter = QPainter(pixmap)
+        paint_overlay(painter, overlay, pixmap.width(), pixmap.height())
+        painter.end()
+        if timer:
+            timer.since("overlay", start)
+    return pixmap
+
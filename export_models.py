@@ -0,0 +1,140 @@
+import argparse
+import os
+import shutil
+
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+from inference import BACKENDS, OBJECT_WEIGHTS, PERSON_WEIGHTS, exported_weights
+
+
+def calibration_frames(video_paths, count=200, imgsz=640):
+    """Sample frames evenly over the given videos and preprocess them the way the detector sees them."""
+    frames = []
+    per_video = max(1, count // len(video_paths))
+    for path in video_paths:
+        cap = cv2.VideoCapture(path)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        for index in np.linspace(0, max(0, total - 1), per_video).astype(int):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, int(index))
+            ok, frame = cap.read()
+            if ok:
+                frames.append(letterbox(frame, imgsz))
+        cap.release()
+    if not frames:
+        raise ValueError("Не удалось прочитать ни одного кадра для калибровки")
+    return frames
+
+
+def letterbox(frame, imgsz):
+    """Resize with padding to imgsz x imgsz and return a 1x3xHxW float32 RGB tensor in [0, 1]."""
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    return np.ascontiguousarray(canvas[:, :, ::-1].transpose(2, 0, 1))[None].astype(np.float32) / 255.0
+
+
+def head_prefix(weights):
+    # Квантование декодирования боксов в детект-голове сильно портит координаты, её оставляем в float
+    model = YOLO(weights)
+    return f"/model.{len(model.model.model) - 1}/"
+
+
+def export_onnx(weights, imgsz=640):
+    return YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+
+
+def quantize_onnx(weights, frames, imgsz=640):
+    """Post-training static INT8 quantization of the ONNX export, calibrated on match frames."""
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.items = iter([{input_name: frame} for frame in frames])
+
+        def get_next(self):
+            return next(self.items, None)
+
+    source = exported_weights(weights, "onnx")
+    if not os.path.exists(source):
+        export_onnx(weights, imgsz)
+    model = onnx.load(source)
+    prefix = head_prefix(weights)
+    target = exported_weights(weights, "onnx-int8")
+    quantize_static(
+        source, target, FrameReader(model.graph.input[0].name),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        nodes_to_exclude=[node.name for node in model.graph.node if node.name.startswith(prefix)],
+    )
+    return target
+
+
+def export_openvino(weights, imgsz=640):
+    return YOLO(weights).export(format="openvino", imgsz=imgsz, dynamic=True)
+
+
+def quantize_openvino(weights, frames, imgsz=640):
+    """Post-training INT8 quantization of the OpenVINO export with NNCF, calibrated on match frames."""
+    import nncf
+    import openvino as ov
+
+    source = exported_weights(weights, "openvino")
+    if not os.path.exists(source):
+        export_openvino(weights, imgsz)
+    xml = next(name for name in os.listdir(source) if name.endswith(".xml"))
+    model = ov.Core().read_model(os.path.join(source, xml))
+    quantized = nncf.quantize(
+        model, nncf.Dataset(frames),
+        preset=nncf.QuantizationPreset.MIXED,
+        ignored_scope=nncf.IgnoredScope(patterns=[f".*{head_prefix(weights)}.*"], validate=False),
+    )
+
+    target = exported_weights(weights, "openvino-int8")
+    os.makedirs(target, exist_ok=True)
+    ov.save_model(quantized, os.path.join(target, xml), compress_to_fp16=False)
+    shutil.copy(os.path.join(source, "metadata.yaml"), target)
+    return target
+
+
+def export(weights, backend, frames=None, imgsz=640):
+    if backend == "onnx":
+        return export_onnx(weights, imgsz)
+    if backend == "onnx-int8":
+        return quantize_onnx(weights, frames, imgsz)
+    if backend == "openvino":
+        return export_openvino(weights, imgsz)
+    if backend == "openvino-int8":
+        return quantize_openvino(weights, frames, imgsz)
+    raise ValueError(f"Неизвестный бэкенд: {backend}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Экспорт моделей для инференса на CPU (ONNX Runtime / OpenVINO)")
+    parser.add_argument("--backend", choices=[b for b in BACKENDS if b != "torch"], required=True)
+    parser.add_argument("--calib-video", nargs="+", default=[],
+                        help="видео матчей для калибровки INT8 (нужно для *-int8)")
+    parser.add_argument("--calib-frames", type=int, default=200, help="кадров для калибровки INT8")
+    parser.add_argument("--imgsz", type=int, default=640)
+    args = parser.parse_args()
+
+    frames = None
+    if args.backend.endswith("-int8"):
+        if not args.calib_video:
+            parser.error("для INT8 укажите --calib-video")
+        frames = calibration_frames(args.calib_video, args.calib_frames, args.imgsz)
+        print(f"[INFO] Кадров для калибровки: {len(frames)}")
+
+    for weights in (OBJECT_WEIGHTS, PERSON_WEIGHTS):
+        print(f"[INFO] {weights} -> {export(weights, args.backend, frames, args.imgsz)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+
+from keyframe_index import KeyframeIndex
+
+
+DecodedFrame = namedtuple("DecodedFrame", ["index", "timestamp_ms", "image"])
+
+
+class FrameReader:
+    """Decode video frames on a worker thread into a bounded ring buffer ahead of the playhead.
+
+    With keyframe_index=True a KeyframeIndex is loaded (or built once) in
+    the background. Seeks then decode forward from the current position
+    when the target is in the same GOP, and every decoded frame is numbered
+    by its presentation timestamp, so a seek that lands early or late
+    is corrected instead of mislabelling frames. With a StageTimer the
+    decode time of every frame is recorded under "decode" when the frame
+    is read, so frames decoded ahead but never consumed are not counted.
+    """
+
+    def __init__(self, video_path, capacity=32, stride=1, keyframe_index=False, timer=None):
+        self.cap = cv2.VideoCapture(video_path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.capacity = capacity
+        self.stride = max(1, stride)
+        self.timer = timer
+
+        self.buffer = deque()
+        self.cond = threading.Condition()
+        self.position = 0
+        self.seek_to = None
+        self.generation = 0
+        self.eof = False
+        self.running = True
+        self.grabbed = False
+        self.keyframes = None
+
+        self.decoded = 0
+        self.consumed = 0
+        self.underruns = 0
+        self.backpressure_waits = 0
+        self.decode_time = 0.0
+        self.max_depth = 0
+        self.seeks = 0
+        self.seek_time = 0.0
+
+        if keyframe_index:
+            threading.Thread(target=self._load_keyframes, args=(video_path,), name="keyframe-index",
+                             daemon=True).start()
+        self.thread = threading.Thread(target=self._run, name="frame-reader", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while self.running and self.seek_to is None and (self.eof or len(self.buffer) >= self.capacity):
+                    if not self.eof:
+                        self.backpressure_waits += 1
+                    self.cond.wait()
+                if not self.running:
+                    break
+                target = self.seek_to
+                self.seek_to = None
+                generation = self.generation
+
+            if target is not None:
+                start = time.perf_counter()
+                self._seek(target, generation)
+                self.seek_time += time.perf_counter() - start
+                self.seeks += 1
+
+            start = time.perf_counter()
+            ok = True
+            for _ in range(self.stride - 1):
+                if not self._grab():
+                    ok = False
+                    break
+                self.position += 1
+            if ok:
+                index = self.position
+                ok = self._grab()
+                if ok:
+                    ok, image = self.cap.retrieve()
+                timestamp_ms = self.cap.get(cv2.CAP_PROP_POS_MSEC)
+                keyframes = self.keyframes
+                if keyframes is not None and (timestamp_ms > 0 or index == 0):
+                    index = keyframes.frame_at(timestamp_ms)
+                if timestamp_ms <= 0 and index > 0:
+                    timestamp_ms = index * 1000.0 / self.fps
+                self.position = index + 1
+            elapsed = time.perf_counter() - start
+
+            with self.cond:
+                if generation != self.generation:
+                    continue
+                if not ok:
+                    self.eof = True
+                    self.cond.notify_all()
+                    continue
+                self.buffer.append((DecodedFrame(index, timestamp_ms, image), elapsed))
+                self.decoded += 1
+                self.decode_time += elapsed
+                self.max_depth = max(self.max_depth, len(self.buffer))
+                self.cond.notify_all()
+
+    def _load_keyframes(self, video_path):
+        self.keyframes = KeyframeIndex.load_or_build(video_path)
+
+    def _grab(self):
+        # После перемотки кадр в позиции position уже захвачен
+        if self.grabbed:
+            self.grabbed = False
+            return True
+        return self.cap.grab()
+
+    def _frame_index(self):
+        return self.keyframes.frame_at(self.cap.get(cv2.CAP_PROP_POS_MSEC))
+
+    def _seek(self, target, generation):
+        keyframes = self.keyframes
+        if keyframes is None:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            self.position = target
+            self.grabbed = False
+            return
+
+        key = keyframes.keyframe_before(target)
+        if key <= self.position <= target:
+            # Цель в том же GOP впереди: докручиваем декодер без перемотки
+            current = self.position if self.grabbed else self.position - 1
+        else:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            if not self.cap.grab():
+                self.position = target
+                self.grabbed = False
+                return
+            current = self._frame_index()
+            if current > target:
+                # Перемотка проскочила цель: начинаем с ключевого кадра
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, key)
+                self.cap.grab()
+                current = self._frame_index()
+            self.grabbed = True
+
+        while current < target and generation == self.generation:
+            if not self.cap.grab():
+                break
+            current += 1
+            self.grabbed = True
+        self.position = current if self.grabbed else current + 1
+
+    def read(self, timeout=0.0):
+        """Pop the next decoded frame, or return None if none is ready within timeout seconds."""
+        with self.cond:
+            if not self.buffer and timeout > 0 and not self.eof:
+                self.cond.wait_for(lambda: self.buffer or self.eof or not self.running, timeout)
+            if not self.buffer:
+                if not self.eof:
+                    self.underruns += 1
+                return None
+            item, elapsed = self.buffer.popleft()
+            self.consumed += 1
+            self.cond.notify_all()
+        if self.timer:
+            self.timer.add("decode", elapsed)
+        return item
+
+    def seek(self, index):
+        """Drop buffered frames and restart decoding from the given frame index."""
+        index = max(0, min(int(index), self.frame_count - 1))
+        with self.cond:
+            self.seek_to = index
+            self.generation += 1
+            self.buffer.clear()
+            self.eof = False
+            self.cond.notify_all()
+
+    def finished(self):
+        """True when the decoder hit the end of the video and every frame has been consumed."""
+        with self.cond:
+            return self.eof and not self.buffer
+
+    def metrics(self):
+        with self.cond:
+            return {
+                "depth": len(self.buffer),
+                "capacity": self.capacity,
+                "max_depth": self.max_depth,
+                "decoded": self.decoded,
+                "consumed": self.consumed,
+                "underruns": self.underruns,
+                "backpressure_waits": self.backpressure_waits,
+                "avg_decode_ms": 1000.0 * self.decode_time / self.decoded if self.decoded else 0.0,
+                "seeks": self.seeks,
+                "avg_seek_ms": 1000.0 * self.seek_time / self.seeks if self.seeks else 0.0,
+            }
+
+    def release(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
+        self.thread.join(timeout=2.0)
+        self.cap.release()
@@ -0,0 +1,117 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+
+class HoopLock:
+    """Lock the hoop box for a fixed camera instead of re-detecting it on every frame.
+
+    The box is the median of the first calibration_frames hoop detections.
+    Once locked, a fresh detection is only needed every revalidate_every
+    frames or right after a scene change; if it keeps disagreeing with the
+    locked box the lock is dropped and calibration starts over. The locked
+    box is saved next to the video so the next session starts locked.
+
+    Frames the model was run on without the hoop class (mark_ball_only)
+    never count as a failed check; a check due on such a frame (e.g. right
+    after a scene change) moves to the next frame that has hoop detections.
+    """
+
+    def __init__(self, video_path, calibration_frames=30, revalidate_every=150, tolerance=0.5,
+                 max_failures=5, scene_change_threshold=25.0):
+        self.path = f"{video_path}.hoop.json"
+        self.calibration_frames = calibration_frames
+        self.revalidate_every = revalidate_every
+        self.tolerance = tolerance
+        self.max_failures = max_failures
+        self.scene_change_threshold = scene_change_threshold
+
+        self.box = None
+        self.frame_size = None
+        self.samples = []
+        self.since_check = 0
+        self.failures = 0
+        self.prev_thumb = None
+        self.ball_only = set()
+        self.load()
+
+    @property
+    def locked(self):
+        return self.box is not None
+
+    def wants_detection(self, ahead=1):
+        """True when any of the next `ahead` frames needs the model's hoop detections."""
+        return not self.locked or self.since_check + ahead > self.revalidate_every
+
+    def mark_ball_only(self, frame_indices):
+        """Remember frames inferred with classes=[ball] so their missing hoop is not taken as a failure."""
+        self.ball_only.update(frame_indices)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.box = tuple(data["box"])
+            self.frame_size = tuple(data["frame_size"])
+            # Сохранённое кольцо проверяется на первом же кадре
+            self.since_check = self.revalidate_every
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARNING] Не удалось прочитать {self.path}: {e}")
+
+    def save(self):
+        try:
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"box": [float(v) for v in self.box], "frame_size": list(self.frame_size)}, f)
+        except OSError as e:
+            print(f"[WARNING] Не удалось сохранить {self.path}: {e}")
+
+    def unlock(self):
+        self.box = None
+        self.samples = []
+        self.failures = 0
+        self.since_check = 0
+
+    def scene_changed(self, frame):
+        thumb = cv2.cvtColor(cv2.resize(frame, (32, 18), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        prev, self.prev_thumb = self.prev_thumb, thumb.astype(np.int16)
+        return prev is not None and np.abs(self.prev_thumb - prev).mean() > self.scene_change_threshold
+
+    def update(self, frame, detections, frame_index=None):
+        """Feed one frame and its hoop detections [(cx, cy, w, h, conf)]; return the locked (cx, cy, w, h) or None."""
+        hoop_searched = frame_index not in self.ball_only
+        if self.ball_only:
+            self.ball_only = {i for i in self.ball_only if frame_index is None or i > frame_index}
+
+        frame_size = (frame.shape[1], frame.shape[0])
+        if self.locked and self.frame_size != frame_size:
+            self.unlock()
+        self.frame_size = frame_size
+
+        if self.scene_changed(frame) and self.locked:
+            self.since_check = self.revalidate_every
+
+        if not self.locked:
+            if detections:
+                self.samples.append(max(detections, key=lambda d: d[4])[:4])
+            if len(self.samples) >= self.calibration_frames:
+                self.box = tuple(float(v) for v in np.median(np.array(self.samples), axis=0))
+                self.samples = []
+                self.save()
+            return self.box
+
+        self.since_check += 1
+        if self.since_check > self.revalidate_every and hoop_searched:
+            cx, cy, w, h = self.box
+            best = max(detections, key=lambda d: d[4]) if detections else None
+            if best is not None and np.hypot(best[0] - cx, best[1] - cy) <= self.tolerance * np.hypot(w, h):
+                self.since_check = 0
+                self.failures = 0
+            else:
+                self.failures += 1
+                if self.failures >= self.max_failures:
+                    self.unlock()
+        return self.box
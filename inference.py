@@ -0,0 +1,286 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+
+from detection_cache import DetectionCache
+from model_registry import registry
+
+
+OBJECT_WEIGHTS = "model/best.pt"
+PERSON_WEIGHTS = "model/yolov8n.pt"
+BALL_CLASS = 0
+
+# torch — исходные веса .pt; остальные варианты готовит export_models.py
+BACKENDS = ("torch", "onnx", "onnx-int8", "openvino", "openvino-int8")
+
+
+def exported_weights(weights, backend):
+    """Path of the given .pt weights exported for a backend."""
+    stem = os.path.splitext(weights)[0]
+    return {
+        "torch": weights,
+        "onnx": f"{stem}.onnx",
+        "onnx-int8": f"{stem}_int8.onnx",
+        "openvino": f"{stem}_openvino_model",
+        "openvino-int8": f"{stem}_int8_openvino_model",
+    }[backend]
+
+
+def resolve_weights(weights, backend):
+    path = exported_weights(weights, backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} не найден, сначала выполните: python export_models.py --backend {backend}")
+    return path
+
+
+def load_models(device, backend="torch"):
+    """Get the ball/hoop detector and the person detector for a backend from the shared registry.
+
+    Every backend is loaded through ultralytics, so the results keep the
+    same boxes/conf/cls layout whatever runs underneath.
+    """
+    return (registry.acquire(resolve_weights(OBJECT_WEIGHTS, backend), device),
+            registry.acquire(resolve_weights(PERSON_WEIGHTS, backend), device))
+
+
+def open_detection_cache(video_path, frame_count, backend="torch", **settings):
+    """Open the detection cache of a video for the weights of a backend and the given inference settings."""
+    weights = [resolve_weights(w, backend) for w in (OBJECT_WEIGHTS, PERSON_WEIGHTS)]
+    return DetectionCache(video_path, frame_count, weights, dict(settings, backend=backend))
+
+
+def release_models(*models):
+    """Hand models obtained from load_models back to the registry."""
+    for model in models:
+        registry.release(model)
+
+
+def to_detections(result):
+    """Convert an ultralytics result into an (N, 6) array of x1, y1, x2, y2, conf, cls."""
+    return result.boxes.data[:, :6].cpu().numpy()
+
+
+def _predict(model, images, device, **kwargs):
+    return [to_detections(r) for r in model(images, device=device, verbose=False, **kwargs)]
+
+
+def _timed_predict(timer, stage, model, images, device, **kwargs):
+    start = time.perf_counter()
+    detections = _predict(model, images, device, **kwargs)
+    if timer:
+        # Время батча делится поровну между его кадрами
+        timer.add(stage, (time.perf_counter() - start) / len(images), count=len(images))
+    return detections
+
+
+class HoopRoiPolicy:
+    """Run the ball/hoop model on a crop around the hoop once the hoop is known.
+
+    The full frame is still used every full_frame_interval frames, while the
+    hoop is unknown and whenever the ball has not been seen for lost_after
+    frames, so a ball coming back from elsewhere on the court is picked up.
+    """
+
+    def __init__(self, analyzer, full_frame_interval=15, lost_after=10, min_size=320):
+        self.analyzer = analyzer
+        self.full_frame_interval = full_frame_interval
+        self.lost_after = lost_after
+        self.min_size = min_size
+        self.since_full = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def crop_for(self, shape):
+        """Return (x1, y1, x2, y2) of the crop for the next frame, or None to use the full frame."""
+        region = self.analyzer.ball_search_region()
+        if (region is None or self.since_full >= self.full_frame_interval
+                or self.analyzer.ball_lost(self.lost_after)):
+            self.since_full = 0
+            self.full_frames += 1
+            return None
+
+        frame_h, frame_w = shape[:2]
+        x1, y1, x2, y2 = region
+        w = min(frame_w, max(x2 - x1, self.min_size))
+        h = min(frame_h, max(y2 - y1, self.min_size))
+        left = int(min(max(0, (x1 + x2 - w) / 2), frame_w - w))
+        top = int(min(max(0, (y1 + y2 - h) / 2), frame_h - h))
+
+        self.since_full += 1
+        self.roi_frames += 1
+        return left, top, left + int(w), top + int(h)
+
+
+class BatchInference:
+    """Collect consecutive decoded frames and run each model once per batch.
+
+    Results are handed out one frame at a time in playback order, so the
+    per-frame handling stays the same regardless of the batch size.
+    batch_size=1 keeps the original frame-by-frame behaviour; larger batches
+    trade latency (bounded by max_latency_ms) for throughput.
+
+    With parallel_models=True the two models run concurrently on their own
+    worker threads, so a frame costs roughly as much as the slower model
+    instead of the sum of both. torch's intra-op thread count is
+    process-wide, so it is set once to half of cpu_threads: each of the two
+    concurrent calls then uses about half of the cores, but the split is
+    not enforced per model.
+
+    With a roi_policy the ball/hoop model only sees the crop the policy
+    picks; its boxes are shifted back into full-frame coordinates. While a
+    hoop_lock holds and needs no re-validation, only the ball class is kept.
+
+    With a DetectionCache, frames that were already inferred are served
+    from disk and only the remaining ones go through the models. Frames
+    cached from a ball-only run are replayed to the hoop_lock as such, and
+    are inferred again when the lock needs hoop detections.
+
+    With a StageTimer each model's time per inferred frame is recorded
+    under "infer_object" and "infer_person".
+
+    With a PlaybackClock, frames the clock already considers too late
+    (clock.drops) are discarded while the batch is collected, before any
+    model runs on them.
+    """
+
+    def __init__(self, reader, model_object, model_person, device, batch_size=1, max_latency_ms=0,
+                 parallel_models=False, cpu_threads=None, roi_policy=None, hoop_lock=None, cache=None,
+                 timer=None, clock=None):
+        self.reader = reader
+        self.model_object = model_object
+        self.model_person = model_person
+        self.device = device
+        self.batch_size = max(1, batch_size)
+        self.max_latency_ms = max_latency_ms
+        self.roi_policy = roi_policy
+        self.hoop_lock = hoop_lock
+        self.cache = cache
+        self.timer = timer
+        self.clock = clock
+        self.pending = deque()
+
+        self.pool_object = self.pool_person = None
+        if parallel_models:
+            total = cpu_threads or os.cpu_count() or 2
+            # Общий для процесса бюджет: две модели работают одновременно и делят ядра примерно пополам
+            torch.set_num_threads(max(1, total // 2))
+            self.pool_object = ThreadPoolExecutor(1, thread_name_prefix="infer-object")
+            self.pool_person = ThreadPoolExecutor(1, thread_name_prefix="infer-person")
+
+        self.batches = 0
+        self.frames = 0
+        self.inferred_frames = 0
+        self.dropped_frames = 0
+        self.infer_time = 0.0
+
+    def next(self, timeout=0.0):
+        """Return (decoded_frame, object_detections, person_detections) or None if no frame is ready."""
+        if not self.pending:
+            self._run_batch(self._collect(timeout))
+        return self.pending.popleft() if self.pending else None
+
+    def _read(self, timeout):
+        while True:
+            decoded = self.reader.read(timeout)
+            if decoded is None or not (self.clock and self.clock.drops(decoded.timestamp_ms)):
+                return decoded
+            # Опоздавший кадр выбрасываем до инференса; следующий берём только если он уже декодирован
+            self.dropped_frames += 1
+            timeout = 0.0
+
+    def _collect(self, timeout):
+        first = self._read(timeout)
+        if first is None:
+            return []
+
+        frames = [first]
+        deadline = time.perf_counter() + self.max_latency_ms / 1000.0
+        while len(frames) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            decoded = self._read(remaining if remaining > 0 else 0.0)
+            if decoded is None:
+                break
+            frames.append(decoded)
+        return frames
+
+    def _run_batch(self, frames):
+        if not frames:
+            return
+
+        start = time.perf_counter()
+        need_hoop = self.hoop_lock is not None and self.hoop_lock.wants_detection(len(frames))
+        cached = [self.cache.get(f.index, need_hoop) if self.cache else None for f in frames]
+        if self.hoop_lock:
+            self.hoop_lock.mark_ball_only(f.index for f, c in zip(frames, cached) if c is not None and c[2])
+        misses = [f for f, c in zip(frames, cached) if c is None]
+        inferred = iter(self._infer(misses) if misses else [])
+        for decoded, c in zip(frames, cached):
+            d_obj, d_person = c[:2] if c is not None else next(inferred)
+            self.pending.append((decoded, d_obj, d_person))
+
+        self.infer_time += time.perf_counter() - start
+        self.batches += 1
+        self.frames += len(frames)
+        self.inferred_frames += len(misses)
+
+    def _infer(self, frames):
+        images = [f.image for f in frames]
+        crops = [self.roi_policy.crop_for(image.shape) if self.roi_policy else None for image in images]
+        object_images = [image if crop is None else image[crop[1]:crop[3], crop[0]:crop[2]]
+                         for image, crop in zip(images, crops)]
+
+        ball_only = self.hoop_lock is not None and not self.hoop_lock.wants_detection(len(frames))
+        if ball_only:
+            self.hoop_lock.mark_ball_only(f.index for f in frames)
+        # classes передаётся всегда: ultralytics запоминает его в предикторе общей модели до следующего вызова
+        object_kwargs = {"classes": [BALL_CLASS] if ball_only else None}
+
+        if self.pool_object:
+            future_obj = self.pool_object.submit(_timed_predict, self.timer, "infer_object", self.model_object,
+                                                 object_images, self.device, **object_kwargs)
+            future_person = self.pool_person.submit(_timed_predict, self.timer, "infer_person", self.model_person,
+                                                    images, self.device)
+            detections_obj, detections_person = future_obj.result(), future_person.result()
+        else:
+            detections_obj = _timed_predict(self.timer, "infer_object", self.model_object, object_images,
+                                            self.device, **object_kwargs)
+            detections_person = _timed_predict(self.timer, "infer_person", self.model_person, images, self.device)
+
+        for detections, crop in zip(detections_obj, crops):
+            if crop is not None:
+                detections[:, :4] += (crop[0], crop[1], crop[0], crop[1])
+
+        if self.cache:
+            for decoded, d_obj, d_person in zip(frames, detections_obj, detections_person):
+                self.cache.put(decoded.index, d_obj, d_person, ball_only)
+        return list(zip(detections_obj, detections_person))
+
+    def seek(self, index):
+        """Drop already inferred frames and restart decoding from index."""
+        self.pending.clear()
+        self.reader.seek(index)
+
+    def finished(self):
+        return not self.pending and self.reader.finished()
+
+    def close(self):
+        for pool in (self.pool_object, self.pool_person):
+            if pool:
+                pool.shutdown(wait=True)
+        if self.cache:
+            self.cache.close()
+
+    def metrics(self):
+        return {
+            "pending": len(self.pending),
+            "batch_size": self.batch_size,
+            "parallel_models": self.pool_object is not None,
+            "roi_frames": self.roi_policy.roi_frames if self.roi_policy else 0,
+            "cached_frames": self.frames - self.inferred_frames,
+            "dropped_frames": self.dropped_frames,
+            "avg_batch": self.frames / self.batches if self.batches else 0.0,
+            "avg_infer_ms_per_frame": 1000.0 * self.infer_time / self.frames if self.frames else 0.0,
+        }
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+
+
+def shirt_rect(bbox, frame_shape):
+    """Rows and columns of the shirt area (middle third of the box height), clipped like numpy slicing."""
+    x1, y1, x2, y2 = bbox
+    h = y2 - y1
+    rows = slice(y1 + h // 3, y1 + 2 * h // 3).indices(frame_shape[0])
+    cols = slice(x1, x2).indices(frame_shape[1])
+    return rows[0], max(rows[0], rows[1]), cols[0], max(cols[0], cols[1])
+
+
+class JerseyFeatures:
+    """Median H, S, V of the shirt area of every person box in a frame, computed in one pass.
+
+    Every pixel is converted to HSV and masked at most once per frame: over
+    the union of the shirt areas when the players overlap enough for that
+    to be cheaper, otherwise area by area. The medians of all boxes are
+    then read off their masked histograms together. The results match
+    int(np.median(...)) on each crop exactly. get() returns the cached
+    value for a box, or None when the box has no usable pixels.
+    """
+
+    def __init__(self, frame, boxes, min_saturation=40, min_value=40):
+        self.values = {}
+        rects = {tuple(bbox): shirt_rect(bbox, frame.shape) for bbox in boxes}
+        rects = {bbox: r for bbox, r in rects.items() if r[1] > r[0] and r[3] > r[2]}
+        if not rects:
+            return
+
+        lower = (0, min_saturation + 1, min_value + 1)
+        top = min(r[0] for r in rects.values())
+        bottom = max(r[1] for r in rects.values())
+        left = min(r[2] for r in rects.values())
+        right = max(r[3] for r in rects.values())
+        if (bottom - top) * (right - left) <= sum((r1 - r0) * (c1 - c0) for r0, r1, c0, c1 in rects.values()):
+            union = cv2.cvtColor(frame[top:bottom, left:right], cv2.COLOR_BGR2HSV)
+            union_mask = cv2.inRange(union, lower, (255, 255, 255))
+        else:
+            union = None
+
+        keys = list(rects)
+        hist = np.empty((len(keys), 3, 256), dtype=np.float32)
+        for i, (r0, r1, c0, c1) in enumerate(rects.values()):
+            if union is not None:
+                region = (slice(r0 - top, r1 - top), slice(c0 - left, c1 - left))
+                hsv, mask = union[region], union_mask[region]
+            else:
+                hsv = cv2.cvtColor(frame[r0:r1, c0:c1], cv2.COLOR_BGR2HSV)
+                mask = cv2.inRange(hsv, lower, (255, 255, 255))
+            for channel in range(3):
+                hist[i, channel] = cv2.calcHist([hsv], [channel], mask, [256], [0, 256]).ravel()
+
+        # Медиана по гистограмме: k-я порядковая статистика — первое значение, где накопленная сумма больше k
+        cum = np.cumsum(hist.astype(np.int64), axis=2)
+        counts = cum[:, 0, -1]
+        low, high = (counts - 1) // 2, counts // 2
+        medians = ((cum > low[:, None, None]).argmax(axis=2) + (cum > high[:, None, None]).argmax(axis=2)) // 2
+
+        for bbox, count, (h, s, v) in zip(keys, counts, medians.tolist()):
+            if count:
+                self.values[bbox] = (h, s, v)
+
+    def get(self, bbox):
+        return self.values.get(tuple(bbox))
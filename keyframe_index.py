@@ -0,0 +1,126 @@
+import os
+import subprocess
+
+import cv2
+import numpy as np
+
+from detection_cache import video_fingerprint
+
+
+class KeyframeIndex:
+    """Presentation timestamps of every frame and the positions of keyframes in a video.
+
+    Built once with ffprobe from the packet list (nothing is decoded) and
+    saved next to the video as <video>.keyframes.npz.
+    """
+
+    def __init__(self, timestamps_ms, keyframes):
+        self.timestamps_ms = timestamps_ms
+        self.keyframes = keyframes
+
+    def __len__(self):
+        return len(self.timestamps_ms)
+
+    def keyframe_before(self, index):
+        """Index of the last keyframe at or before the given frame."""
+        pos = np.searchsorted(self.keyframes, index, side="right") - 1
+        return int(self.keyframes[max(pos, 0)])
+
+    def keyframe_after(self, index):
+        """Index of the first keyframe after the given frame, or the frame count if there is none."""
+        pos = np.searchsorted(self.keyframes, index, side="right")
+        return int(self.keyframes[pos]) if pos < len(self.keyframes) else len(self.timestamps_ms)
+
+    def timestamp_ms(self, index):
+        return float(self.timestamps_ms[min(max(index, 0), len(self.timestamps_ms) - 1)])
+
+    def frame_at(self, timestamp_ms):
+        """Index of the frame shown at the given presentation time."""
+        pos = int(np.searchsorted(self.timestamps_ms, timestamp_ms))
+        if pos > 0 and (pos == len(self.timestamps_ms)
+                        or timestamp_ms - self.timestamps_ms[pos - 1] < self.timestamps_ms[pos] - timestamp_ms):
+            pos -= 1
+        return pos
+
+    @classmethod
+    def build(cls, video_path):
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", video_path],
+            capture_output=True, text=True, check=True).stdout
+
+        pts, key = [], []
+        for line in out.splitlines():
+            fields = line.split(",")
+            if len(fields) < 2 or fields[0] in ("", "N/A"):
+                continue
+            pts.append(float(fields[0]))
+            key.append("K" in fields[1])
+        if not pts:
+            raise ValueError("ffprobe не вернул ни одного пакета")
+
+        # Пакеты идут в порядке декодирования, номер кадра — позиция по времени показа
+        order = np.argsort(pts, kind="stable")
+        timestamps_ms = (np.asarray(pts)[order] - min(pts)) * 1000.0
+        keyframes = np.flatnonzero(np.asarray(key)[order]).astype(np.int64)
+        if not len(keyframes) or keyframes[0] != 0:
+            keyframes = np.concatenate([[0], keyframes])
+        return cls(timestamps_ms, keyframes)
+
+    @classmethod
+    def load_or_build(cls, video_path):
+        """Load the cached index of a video, building it first if needed; None if ffprobe is unavailable."""
+        path = f"{video_path}.keyframes.npz"
+        fingerprint = video_fingerprint(video_path)
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    if str(data["fingerprint"]) == fingerprint:
+                        return cls(data["timestamps_ms"], data["keyframes"])
+            except (OSError, ValueError, KeyError) as e:
+                print(f"[WARNING] Не удалось прочитать {path}: {e}")
+
+        try:
+            index = cls.build(video_path)
+        except (OSError, subprocess.CalledProcessError, ValueError) as e:
+            print(f"[WARNING] Индекс ключевых кадров не построен ({e}), перемотка будет медленнее")
+            return None
+
+        try:
+            with open(path, "wb") as f:
+                np.savez(f, timestamps_ms=index.timestamps_ms, keyframes=index.keyframes,
+                         fingerprint=np.array(fingerprint))
+        except OSError as e:
+            print(f"[WARNING] Не удалось сохранить {path}: {e}")
+        return index
+
+
+class ScrubPreview:
+    """Cheap approximate frames for slider dragging, decoded apart from the playback decoder.
+
+    OpenCV seeks to the keyframe before N - 16 and decodes forward to N, so
+    asking for keyframe + 16 costs a fixed handful of decodes instead of up
+    to a whole GOP. One preview is shown per GOP.
+    """
+
+    SEEK_MARGIN = 16
+
+    def __init__(self, video_path):
+        self.cap = cv2.VideoCapture(video_path)
+        self.last = None
+
+    def frame_at(self, index, keyframes):
+        """Return (frame_index, image) near index, or None if the same GOP is already shown."""
+        key = keyframes.keyframe_before(index)
+        if key == self.last:
+            return None
+        target = min(key + self.SEEK_MARGIN, keyframes.keyframe_after(key) - 1)
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+        ok, image = self.cap.read()
+        if not ok:
+            return None
+        self.last = key
+        return target, image
+
+    def release(self):
+        self.cap.release()
@@ -1,30 +1,21 @@
 import sys
 import pymysql
-import mysql.connector
 import time
-import cv2
-import numpy as np
-import torch
-from ultralytics import YOLO
-from basket_utils import score, detect_down, detect_up, in_hoop_region, clean_hoop_pos, clean_ball_pos, get_device
+from db_utils import db_user, db_pass
 from PyQt5.QtWidgets import QFrame
-from PyQt5.QtGui import QImage, QPixmap, QFont, QColor
-from PyQt5.QtCore import Qt, QDateTime, QDate, QTimer, QSize
+from PyQt5.QtGui import QFont, QColor
+from PyQt5.QtCore import Qt, QDateTime, QDate, QThread, pyqtSignal
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, 
     QPushButton, QLabel, QListWidget, 
     QLineEdit, QMessageBox, QHBoxLayout, QSizePolicy, QDateEdit, QCheckBox,
-    QSlider, QDialog, QListWidgetItem, QGraphicsDropShadowEffect, QToolButton,
-    QScrollArea, QSpacerItem, QStyle
+    QDialog, QListWidgetItem, QGraphicsDropShadowEffect, QToolButton,
+    QScrollArea, QSpacerItem
 )
-from werkzeug.security import generate_password_hash, check_password_hash
+from auth_service import auth_service, hash_password
 
 
-db_user = 'root'
-db_pass = 'root'
-
-
-def wait_for_mysql(user, password, host='localhost', port=3307, db='basketball_db', retries=10):
+def wait_for_mysql(user, password, host='localhost', port=3307, db='basketball_db', retries=10, on_retry=None):
     for i in range(retries):
         try:
             connection = pymysql.connect(
@@ -41,22 +32,12 @@ def wait_for_mysql(user, password, host='localhost', port=3307, db='basketball_d
             return True
         except pymysql.err.OperationalError as e:
             print(f"🔄 Попытка {i+1}: MySQL ещё не готов ({e})")
+            if on_retry:
+                on_retry(i + 1, retries)
             time.sleep(2)
     return False
 
 
-if not wait_for_mysql(db_user, db_pass):
-    print("❌ Не удалось дождаться MySQL")
-    exit(1)
-
-def hash_password(password: str) -> str:
-    """Хэширование пароля."""
-    return generate_password_hash(password)
-
-def check_password(hashed_password: str, plain_password: str) -> bool:
-    """Проверка пароля с хэшем."""
-    return check_password_hash(hashed_password, plain_password)
-
 def create_admin_user_if_not_exists(db_user, db_pass):
     """Создание админа, если его нет в базе данных."""
     try:
@@ -92,7 +73,21 @@ def create_admin_user_if_not_exists(db_user, db_pass):
         print(f"Ошибка при добавлении админ-пользователя: {e}")
 
 
-create_admin_user_if_not_exists(db_user, db_pass)
+class DbBootstrap(QThread):
+    """Wait for MySQL and create the admin user off the GUI thread so the login window shows at once."""
+
+    status = pyqtSignal(str)
+    ready = pyqtSignal(bool)
+
+    def run(self):
+        self.status.emit("Подключение к базе данных...")
+        ok = wait_for_mysql(db_user, db_pass,
+                            on_retry=lambda i, n: self.status.emit(f"База данных ещё не готова, попытка {i} из {n}..."))
+        if ok:
+            create_admin_user_if_not_exists(db_user, db_pass)
+        else:
+            print("❌ Не удалось дождаться MySQL")
+        self.ready.emit(ok)
 
 
 def get_matches(is_past, db_user, db_pass):
@@ -143,9 +138,10 @@ def add_match(team1, team2, match_time, db_user, db_pass):
 
 
 class LoginWindow(QWidget):
-    def __init__(self):
+    def __init__(self, db_ready=True):
         super().__init__()
         self.is_fullscreen = True
+        self.db_ready = db_ready
 
         self.setWindowTitle("Вход в систему")
         self.setStyleSheet("background-color: #121212; font-family: 'Segoe UI', Arial; color: #ffffff;")
@@ -230,6 +226,14 @@ class LoginWindow(QWidget):
         self.register_button.clicked.connect(self.open_registration_window)
         card_layout.addWidget(self.register_button)
 
+        self.db_status_label = QLabel("")
+        self.db_status_label.setFont(QFont("Segoe UI", 12))
+        self.db_status_label.setAlignment(Qt.AlignCenter)
+        self.db_status_label.setStyleSheet("color: #aaaaaa;")
+        card_layout.addWidget(self.db_status_label)
+        self.login_button.setEnabled(self.db_ready)
+        self.register_button.setEnabled(self.db_ready)
+
         outer_layout.addWidget(self.card)
         outer_layout.addStretch()
 
@@ -321,46 +325,40 @@ class LoginWindow(QWidget):
             }
         """
 
+    def set_db_status(self, text):
+        self.db_status_label.setText(text)
+
+    def on_db_ready(self, ok):
+        self.db_ready = ok
+        self.login_button.setEnabled(ok)
+        self.register_button.setEnabled(ok)
+        if ok:
+            self.db_status_label.setText("")
+        else:
+            self.db_status_label.setText("Не удалось подключиться к базе данных")
+            self.db_status_label.setStyleSheet("color: #ff6b6b;")
+
     def try_login(self):
         username = self.username_input.text()
         password = self.password_input.text()
         if username and password:
-            user = self.authenticate_user(username, password)
-            if user:
-                self.open_main_window(user['role'])
-            else:
-                QMessageBox.warning(self, "Ошибка", "Неверный логин или пароль.")
+            # Поиск пользователя и проверка хэша идут в пуле auth_service, окно не замирает
+            self.login_button.setEnabled(False)
+            self.login_button.setText("Вход...")
+            self.auth_request = auth_service.login(username, password, self.on_login_finished)
         else:
             QMessageBox.warning(self, "Ошибка", "Пожалуйста, заполните оба поля.")
 
-    def authenticate_user(self, username, password):
-        """Метод для аутентификации пользователя"""
-        try:
-            
-            connection = pymysql.connect(
-                host='localhost',
-                user=db_user,
-                port=3307,
-                password=db_pass,
-                db='basketball_db',
-                charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor
-            )
-
-            with connection.cursor() as cursor:
-                cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
-                user = cursor.fetchone()
-
-            connection.close()
-
-            if user and check_password(user['password'], password):  
-                return user  
-            else:
-                return None
-
-        except Exception as e:
-            print(f"Ошибка при подключении к базе данных: {e}")
-            return None
+    def on_login_finished(self, user, error):
+        self.auth_request = None
+        self.login_button.setEnabled(True)
+        self.login_button.setText("Войти")
+        if user:
+            self.open_main_window(user['role'])
+        elif error:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось подключиться к базе данных: {error}")
+        else:
+            QMessageBox.warning(self, "Ошибка", "Неверный логин или пароль.")
 
     def open_main_window(self, role):
         self.main_window = MainWindow(db_user, db_pass, role=role)
@@ -541,30 +539,20 @@ class RegistrationWindow(QWidget):
             QMessageBox.warning(self, "Ошибка", "Пожалуйста, заполните все поля.")
             return
 
-        hashed_password = hash_password(password)
+        self.register_button.setEnabled(False)
+        self.auth_request = auth_service.register(username, password, self.on_register_finished)
 
-        try:
-            connection = pymysql.connect(
-                host='localhost',
-                user=db_user,
-                port=3307,
-                password=db_pass,
-                db='basketball_db',
-                charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor
-            )
-            with connection.cursor() as cursor:
-                cursor.execute("INSERT INTO users (username, password) VALUES (%s, %s)", (username, hashed_password))
-                connection.commit()
-            connection.close()
-
-            QMessageBox.information(self, "Успех", "Вы успешно зарегистрировались!")
-            self.login_window = LoginWindow()
-            self.login_window.show()
-            self.close()
+    def on_register_finished(self, ok, error):
+        self.auth_request = None
+        self.register_button.setEnabled(True)
+        if not ok:
+            QMessageBox.warning(self, "Ошибка", f"Не удалось зарегистрировать пользователя: {error}")
+            return
 
-        except Exception as e:
-            QMessageBox.warning(self, "Ошибка", f"Не удалось зарегистрировать пользователя: {e}")
+        QMessageBox.information(self, "Успех", "Вы успешно зарегистрировались!")
+        self.login_window = LoginWindow()
+        self.login_window.show()
+        self.close()
 
 class MainWindow(QWidget):
     def __init__(self, db_user, db_pass, role):
@@ -940,901 +928,6 @@ class MatchesWindow(QWidget):
             QMessageBox.warning(self, "Ошибка", f"Не удалось удалить матч: {e}")
 
 
-# -------------------------------------
-#               Запись в БД
-
-def insert_shot_in_db(match_id, team_name, points):
-    conn = None
-    cursor = None
-    try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            port=3307,
-            password="root",
-            database="basketball_db"
-        )
-        cursor = conn.cursor()
-
-        points_int = int(points)
-
-        
-        cursor.execute("""
-            SELECT id FROM teams WHERE LOWER(TRIM(name)) = LOWER(TRIM(%s))
-        """, (team_name,))
-        team = cursor.fetchone()
-        if not team:
-            print(f"[WARNING] Команда с названием '{team_name}' не найдена.")
-            return None
-        team_id = team[0]
-
-        
-        cursor.execute("""
-            INSERT INTO events (team_id, match_id, event_type, points)
-            VALUES (%s, %s, 'shot', %s)
-        """, (team_id, match_id, points_int))
-
-        
-        cursor.execute("SELECT team1, team2 FROM matches WHERE id = %s", (match_id,))
-        teams = cursor.fetchone()
-        if not teams:
-            print("[ERROR] Матч не найден в базе.")
-            conn.rollback()
-            return None
-        team1, team2 = teams
-
-        
-        cursor.execute("SELECT 1 FROM stats WHERE match_id = %s", (match_id,))
-        exists = cursor.fetchone()
-        if not exists:
-            cursor.execute("""
-                INSERT INTO stats (match_id, team1_points, team2_points,
-                                   team1_twos, team2_twos, team1_threes, team2_threes)
-                VALUES (%s, 0, 0, 0, 0, 0, 0)
-            """, (match_id,))
-
-        
-        if team_name.lower().strip() == team1.lower().strip():
-            cursor.execute("""
-                UPDATE stats 
-                SET team1_points = team1_points + %s,
-                    team1_twos = team1_twos + %s,
-                    team1_threes = team1_threes + %s
-                WHERE match_id = %s
-            """, (points_int, 1 if points_int == 2 else 0, 1 if points_int == 3 else 0, match_id))
-
-        elif team_name.lower().strip() == team2.lower().strip():
-            cursor.execute("""
-                UPDATE stats 
-                SET team2_points = team2_points + %s,
-                    team2_twos = team2_twos + %s,
-                    team2_threes = team2_threes + %s
-                WHERE match_id = %s
-            """, (points_int, 1 if points_int == 2 else 0, 1 if points_int == 3 else 0, match_id))
-
-        else:
-            print("[WARNING] Команда не принадлежит ни одной из команд матча.")
-
-        conn.commit()
-        print(f"[INFO] Бросок команды '{team_name}' ({points_int} очков) записан, очки обновлены.")
-        return team_id
-
-    except mysql.connector.Error as err:
-        print(f"[ERROR] Ошибка записи в БД: {err}")
-        if conn:
-            conn.rollback()
-        return None
-
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
-
-def insert_foul_in_db(match_id, team_name, foul_time=None):
-    import mysql.connector
-    import datetime
-    conn = None
-    cursor = None
-    try:
-        conn = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            port = 3307,
-            password="root",
-            database="basketball_db"
-        )
-        cursor = conn.cursor()
-
-        
-        cursor.execute("""
-            SELECT id FROM teams WHERE LOWER(TRIM(name)) = LOWER(TRIM(%s))
-        """, (team_name,))
-        team = cursor.fetchone()
-        if not team:
-            print(f"[WARNING] Команда с названием '{team_name}' не найдена.")
-            return None
-        team_id = team[0]
-
-        
-        cursor.execute("SELECT team1, team2 FROM matches WHERE id = %s", (match_id,))
-        teams = cursor.fetchone()
-        if not teams:
-            print("[ERROR] Матч не найден в базе.")
-            conn.rollback()
-            return None
-        team1, team2 = teams
-
-        
-        cursor.execute("SELECT 1 FROM stats WHERE match_id = %s", (match_id,))
-        exists = cursor.fetchone()
-        if not exists:
-            cursor.execute("""
-                INSERT INTO stats (match_id, team1_fouls, team2_fouls)
-                VALUES (%s, 0, 0)
-            """, (match_id,))
-
-        
-        if foul_time is None:
-            foul_time = datetime.datetime.now()
-        cursor.execute("""
-            INSERT INTO events (team_id, match_id, event_type, event_time)
-            VALUES (%s, %s, 'foul', %s)
-        """, (team_id, match_id, foul_time))
-
-        
-        if team_name.lower().strip() == team1.lower().strip():
-            cursor.execute("""
-                UPDATE stats 
-                SET team1_fouls = team1_fouls + 1
-                WHERE match_id = %s
-            """, (match_id,))
-        elif team_name.lower().strip() == team2.lower().strip():
-            cursor.execute("""
-                UPDATE stats 
-                SET team2_fouls = team2_fouls + 1
-                WHERE match_id = %s
-            """, (match_id,))
-        else:
-            print("[WARNING] Команда не принадлежит ни одной из команд матча.")
-            conn.rollback()
-            return None
-
-        conn.commit()
-        print(f"[INFO] Фол команды '{team_name}' записан, статистика обновлена.")
-        return team_id
-
-    except mysql.connector.Error as err:
-        print(f"[ERROR] Ошибка записи в БД: {err}")
-        if conn:
-            conn.rollback()
-        return None
-
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
-#------------------------------------------
-
-class MatchViewer(QWidget):
-    def __init__(self, match_id):
-        super().__init__()
-        self.match_id = match_id
-
-        self.conn = pymysql.connect(
-            host='localhost', user=db_user, password=db_pass, db='basketball_db',port=3307,
-            charset='utf8mb4', cursorclass=pymysql.cursors.DictCursor
-        )
-
-        with self.conn.cursor() as cursor:
-            cursor.execute("SELECT video_path, team1, team2 FROM matches WHERE id = %s", (self.match_id,))
-            result = cursor.fetchone()
-            video_path = result['video_path'] if result else 'model/video_test_8.mp4'
-            self.team1 = result['team1']
-            self.team2 = result['team2']
-
-        
-        self.team_colors = {}
-        self.team_colors_history = {self.team1: [], self.team2: []}
-        self.max_color_history = 10
-
-        
-        self.setWindowTitle("Просмотр матча")
-        self.showFullScreen()
-        self.is_fullscreen = True
-
-        self.setStyleSheet("""
-            background-color: #1c1c1e;
-            color: #eaeaea;
-            font-family: Arial, sans-serif;
-            font-size: 16px;
-        """)
-
-        self.layout = QVBoxLayout()
-        self.layout.setContentsMargins(15, 15, 15, 15)
-        self.layout.setSpacing(15)
-        self.setLayout(self.layout)
-
-        self.video_label = QLabel()
-        self.video_label.setStyleSheet("background-color: black; border-radius: 8px;")
-        self.video_label.setAlignment(Qt.AlignCenter)
-        self.layout.addWidget(self.video_label, stretch=1)
-
-        
-        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
-        self.model_object = YOLO("model/best.pt").to(self.device)
-        self.model_person = YOLO("model/yolov8n.pt").to(self.device)
-        self.class_names_obj = ['Basketball', 'Basketball Hoop']
-        self.cap = cv2.VideoCapture(video_path)
-
-        
-        self.frame_count = 0
-        self.makes = 0
-        self.attempts = 0
-        self.score_team1 = 0
-        self.score_team2 = 0
-        self.ball_pos = []
-        self.hoop_pos = []
-        self.up = False
-        self.down = False
-        self.tracked_players_team1 = {}
-        self.tracked_players_team2 = {}
-        self.max_id_team1 = 0
-        self.max_id_team2 = 0
-        self.max_tracking_distance = 50
-
-        
-        self.fade_frames = 20
-        self.fade_counter = 0
-        self.overlay_color = (0, 0, 0)
-        self.overlay_text = "..."
-
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)
-
-        self.foul_overlay_color = (0, 0, 255)  
-        self.foul_overlay_text = ""
-        self.foul_fade_counter = 0
-        self.foul_fade_frames = 30  
-        
-
-        
-        self.controls_layout = QHBoxLayout()
-        self.controls_layout.setSpacing(20)
-
-        btn_style = """
-            QPushButton {
-                background-color: #9400d3;
-                color: white;
-                border-radius: 10px;
-                padding: 10px;
-                font-weight: bold;
-                font-size: 16px;
-                min-width: 120px;
-            }
-            QPushButton:hover {
-                background-color: #b759e0;
-            }
-            QPushButton:pressed {
-                background-color: #7a00b8;
-            }
-        """
-
-        self.play_button = QPushButton("▶️ Play")
-        self.pause_button = QPushButton("⏸ Pause")
-        self.seek_backward_button = QPushButton("⏪ Backward")
-        self.seek_forward_button = QPushButton("⏩ Forward")
-
-        for btn in [self.play_button, self.pause_button, self.seek_backward_button, self.seek_forward_button]:
-            btn.setStyleSheet(btn_style)
-
-        
-        style = QApplication.style()
-        self.icon_fullscreen = style.standardIcon(QStyle.SP_TitleBarMaxButton)
-        self.icon_exit_fullscreen = style.standardIcon(QStyle.SP_TitleBarNormalButton)
-
-        self.toggle_fullscreen_btn = QPushButton()
-        self.toggle_fullscreen_btn.setIcon(self.icon_exit_fullscreen)
-        self.toggle_fullscreen_btn.setIconSize(QSize(24, 24))
-        self.toggle_fullscreen_btn.setFixedSize(40, 40)
-        self.toggle_fullscreen_btn.setStyleSheet("background-color: transparent; border: none;")
-        self.toggle_fullscreen_btn.setToolTip("Переключить полноэкранный режим")
-
-        self.controls_layout.addWidget(self.seek_backward_button)
-        self.controls_layout.addWidget(self.pause_button)
-        self.controls_layout.addWidget(self.play_button)
-        self.controls_layout.addWidget(self.seek_forward_button)
-        self.controls_layout.addWidget(self.toggle_fullscreen_btn)
-
-        self.layout.addLayout(self.controls_layout)
-
-        self.play_button.clicked.connect(self.play_video)
-        self.pause_button.clicked.connect(self.pause_video)
-        self.seek_forward_button.clicked.connect(self.seek_forward)
-        self.seek_backward_button.clicked.connect(self.seek_backward)
-        self.toggle_fullscreen_btn.clicked.connect(self.toggle_fullscreen)
-
-        self.is_playing = True
-
-        
-        self.slider = QSlider(Qt.Horizontal)
-        self.slider.setMinimum(0)
-        total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        self.slider.setMaximum(total_frames - 1)
-        self.slider.sliderPressed.connect(self.slider_pressed)
-        self.slider.sliderReleased.connect(self.slider_released)
-
-        self.layout.addWidget(self.slider)
-        self.slider_is_pressed = False
-
-        
-    def play_video(self):
-        if not self.is_playing:
-            self.timer.start(30)
-            self.is_playing = True
-
-    def pause_video(self):
-        if self.is_playing:
-            self.timer.stop()
-            self.is_playing = False
-
-    def seek_forward(self):
-        current_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-        new_frame = current_frame + 30
-        total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        if new_frame >= total_frames:
-            new_frame = total_frames - 1
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, new_frame)
-        self.update_frame()
-
-    def seek_backward(self):
-        current_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-        new_frame = current_frame - 30
-        if new_frame < 0:
-            new_frame = 0
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, new_frame)
-        self.update_frame()
-
-    def slider_pressed(self):
-        self.slider_is_pressed = True
-        self.pause_video()
-
-    def slider_released(self):
-        new_pos = self.slider.value()
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, new_pos)
-        self.slider_is_pressed = False
-        self.play_video()
-
-    def toggle_fullscreen(self):
-        if self.is_fullscreen:
-            self.showNormal()
-            self.is_fullscreen = False
-            self.toggle_fullscreen_btn.setIcon(self.icon_fullscreen)
-            self.toggle_fullscreen_btn.setToolTip("🗖")
-        else:
-            self.showFullScreen()
-            self.is_fullscreen = True
-            self.toggle_fullscreen_btn.setIcon(self.icon_exit_fullscreen)
-            self.toggle_fullscreen_btn.setToolTip("🗖")
-
-    def keyPressEvent(self, event):
-        if event.key() == Qt.Key_Escape and self.is_fullscreen:
-            self.toggle_fullscreen()
-        else:
-            super().keyPressEvent(event)
-
-    def save_team_to_db(self, name, hsv):
-        with self.conn.cursor() as cursor:
-            cursor.execute("SELECT * FROM teams WHERE name = %s", (name,))
-            if not cursor.fetchone():
-                cursor.execute("INSERT INTO teams (name, hsv_h, hsv_s, hsv_v) VALUES (%s, %s, %s, %s)",
-                               (name, hsv[0], hsv[1], hsv[2]))
-                self.conn.commit()
-                print(f"[DB] Команда '{name}' добавлена с HSV: {hsv}")
-
-
-    def hsv_distance(self, hsv1, hsv2):
-        return np.linalg.norm(np.array(hsv1) - np.array(hsv2))
-
-    def average_hsv_history(self, hsv_list):
-        """Вычислить усреднённое HSV из списка кортежей."""
-        if not hsv_list:
-            return (0, 0, 0)
-        arr = np.array(hsv_list)
-        mean_hsv = tuple(np.median(arr, axis=0).astype(int))
-        return mean_hsv
-
-
-    def detect_foul(self, all_detected_players):
-        if len(all_detected_players) < 2:
-            return
-
-        current_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-
-        if hasattr(self, "last_foul_frame") and (current_frame - self.last_foul_frame < 30):
-            return
-
-        for center_a, (x1_a, y1_a, x2_a, y2_a), color_a in all_detected_players:
-            for center_b, (x1_b, y1_b, x2_b, y2_b), color_b in all_detected_players:
-                if (x1_a, y1_a, x2_a, y2_a) == (x1_b, y1_b, x2_b, y2_b):
-                    continue
-
-                height_b = y2_b - y1_b
-                mid_b = y1_b + 0.55 * height_b
-
-                if y1_a >= mid_b:
-                    height_a = y2_a - y1_a
-                    shirt_area = self.frame[y1_a + height_a // 3 : y1_a + 2 * height_a // 3, x1_a : x2_a]
-                    if shirt_area.size == 0:
-                        continue
-
-                    hsv = cv2.cvtColor(shirt_area, cv2.COLOR_BGR2HSV)
-                    h_chan, s_chan, v_chan = cv2.split(hsv)
-                    mask = (s_chan > 40) & (v_chan > 40)
-
-                    if np.count_nonzero(mask) == 0:
-                        continue
-
-                    h = int(np.median(h_chan[mask]))
-                    s = int(np.median(s_chan[mask]))
-                    v = int(np.median(v_chan[mask]))
-                    player_hsv = (h, s, v)
-
-                    dist1 = self.hsv_distance(player_hsv, self.team_colors.get(self.team1, (0, 0, 0)))
-                    dist2 = self.hsv_distance(player_hsv, self.team_colors.get(self.team2, (0, 0, 0)))
-
-                    foul_team = self.team2 if dist1 < dist2 else self.team1
-
-                    insert_foul_in_db(self.match_id, foul_team)
-                    print(f"[ФОЛ] Нарушение со стороны: команда '{foul_team}' (игрок на полу)")
-
-                    self.last_foul_frame = current_frame
-
-                    
-                    self.foul_overlay_color = (0, 0, 255)
-                    self.foul_overlay_text = f"Foul by {foul_team}"
-                    self.foul_fade_counter = self.foul_fade_frames
-
-                    return
-
-    def update_frame(self):
-        if not self.slider_is_pressed:
-            ret, frame = self.cap.read()
-            if not ret:
-                self.timer.stop()
-                return
-
-        current_frame = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
-        self.slider.setValue(current_frame)
-        ret, self.frame = self.cap.read()
-        if not ret:
-            self.timer.stop()
-            self.cap.release()
-            return
-
-        frame_height, frame_width = self.frame.shape[:2]
-        results_obj = self.model_object(self.frame, device=self.device)
-        for r in results_obj:
-            for box in r.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                w, h = x2 - x1, y2 - y1
-                conf = float(box.conf[0])
-                cls = int(box.cls[0])
-                label = self.class_names_obj[cls]
-                center = (x1 + w // 2, y1 + h // 2)
-
-                if label == "Basketball" and conf > 0.15:
-                    self.ball_pos.append((center, self.frame_count, w, h, conf))
-                    cv2.rectangle(self.frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-
-                if label == "Basketball Hoop" and conf > 0.3:
-                    self.hoop_pos.append((center, self.frame_count, w, h, conf))
-                    cv2.rectangle(self.frame, (x1, y1), (x2, y2), (0, 140, 255), 2)
-
-        results_person = self.model_person(self.frame, device=self.device)
-        detected_players_team1, detected_players_team2 = [], []
-
-        for r in results_person:
-            for box in r.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                conf = float(box.conf[0])
-                if conf < 0.4:
-                    continue
-
-                w, h = x2 - x1, y2 - y1
-                center = ((x1 + x2) // 2, (y1 + y2) // 2)
-
-                
-                if center[1] < frame_height * 0.4:
-                    continue
-                if center[0] < frame_width * 0.05 or center[0] > frame_width * 0.95:
-                    continue
-                if w * h < 2000:
-                    continue
-
-                shirt_area = self.frame[y1 + h // 3: y1 + 2 * h // 3, x1:x2]
-                if shirt_area.size == 0:
-                    continue
-
-                hsv = cv2.cvtColor(shirt_area, cv2.COLOR_BGR2HSV)
-                h_chan, s_chan, v_chan = cv2.split(hsv)
-
-                
-                mask = (s_chan > 40) & (v_chan > 40)
-                if np.count_nonzero(mask) == 0:
-                    continue
-
-                h_filtered = h_chan[mask]
-                s_filtered = s_chan[mask]
-                v_filtered = v_chan[mask]
-
-                median_h = int(np.median(h_filtered))
-                median_s = int(np.median(s_filtered))
-                median_v = int(np.median(v_filtered))
-
-                avg_hsv = (median_h, median_s, median_v)
-
-               
-                if self.team1 not in self.team_colors:
-                    self.team_colors_history[self.team1].append(avg_hsv)
-                    self.team_colors[self.team1] = self.average_hsv_history(self.team_colors_history[self.team1])
-                    self.save_team_to_db(self.team1, self.team_colors[self.team1])
-                elif self.team2 not in self.team_colors and avg_hsv != self.team_colors.get(self.team1, ()):
-                    self.team_colors_history[self.team2].append(avg_hsv)
-                    self.team_colors[self.team2] = self.average_hsv_history(self.team_colors_history[self.team2])
-                    self.save_team_to_db(self.team2, self.team_colors[self.team2])
-                else:
-                    
-                    dist1 = self.hsv_distance(avg_hsv, self.team_colors.get(self.team1, (0, 0, 0)))
-                    dist2 = self.hsv_distance(avg_hsv, self.team_colors.get(self.team2, (0, 0, 0)))
-
-                    if dist1 <= dist2:
-                        self.team_colors_history[self.team1].append(avg_hsv)
-                        if len(self.team_colors_history[self.team1]) > self.max_color_history:
-                            self.team_colors_history[self.team1].pop(0)
-                        self.team_colors[self.team1] = self.average_hsv_history(self.team_colors_history[self.team1])
-                    else:
-                        self.team_colors_history[self.team2].append(avg_hsv)
-                        if len(self.team_colors_history[self.team2]) > self.max_color_history:
-                            self.team_colors_history[self.team2].pop(0)
-                        self.team_colors[self.team2] = self.average_hsv_history(self.team_colors_history[self.team2])
-
-                
-                dist1 = self.hsv_distance(avg_hsv, self.team_colors.get(self.team1, (0, 0, 0)))
-                dist2 = self.hsv_distance(avg_hsv, self.team_colors.get(self.team2, (0, 0, 0)))
-
-                if dist1 <= dist2:
-                    color = (0, 140, 255)
-                    detected_players_team1.append((center, (x1, y1, x2, y2), color))
-                else:
-                    color = (255, 0, 0)
-                    detected_players_team2.append((center, (x1, y1, x2, y2), color))
-
-        
-        if self.foul_fade_counter > 0:
-            alpha = self.foul_fade_counter / self.foul_fade_frames
-            overlay = self.frame.copy()
-            cv2.rectangle(overlay, (0, 0), (self.frame.shape[1], 80), self.foul_overlay_color, -1)
-            cv2.addWeighted(overlay, alpha * 0.4, self.frame, 1 - alpha * 0.4, 0, self.frame)
-
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 2
-            thickness = 4
-
-            text_size, _ = cv2.getTextSize(self.foul_overlay_text, font, font_scale, thickness)
-            text_width, text_height = text_size
-            center_x = self.frame.shape[1] // 2
-
-            text_x = center_x - text_width // 2
-            text_y = 50 + text_height // 2
-
-            cv2.putText(self.frame, self.foul_overlay_text, (text_x, text_y),
-                        font, font_scale, (255, 255, 255), thickness)
-
-            self.foul_fade_counter -= 1
-
-        def track_players(detected, tracked, max_id):
-            updated = {}
-            assigned = set()
-            for center, bbox, color in detected:
-                min_dist = float('inf')
-                matched_id = None
-                for pid, (prev_center, _) in tracked.items():
-                    dist = np.linalg.norm(np.array(center) - np.array(prev_center))
-                    if dist < min_dist and dist < self.max_tracking_distance and pid not in assigned:
-                        min_dist = dist
-                        matched_id = pid
-                if matched_id:
-                    updated[matched_id] = (center, color)
-                    assigned.add(matched_id)
-                else:
-                    max_id += 1
-                    updated[max_id] = (center, color)
-                    assigned.add(max_id)
-            return updated, max_id
-
-        self.tracked_players_team1, self.max_id_team1 = track_players(
-            detected_players_team1, self.tracked_players_team1, self.max_id_team1)
-        self.tracked_players_team2, self.max_id_team2 = track_players(
-            detected_players_team2, self.tracked_players_team2, self.max_id_team2)
-
-        def track_players(detected, tracked, max_id):
-            updated = {}
-            assigned = set()
-            for center, bbox, color in detected:
-                min_dist = float('inf')
-                matched_id = None
-                for pid, (prev_center, _) in tracked.items():
-                    dist = np.linalg.norm(np.array(center) - np.array(prev_center))
-                    if dist < min_dist and dist < self.max_tracking_distance and pid not in assigned:
-                        min_dist = dist
-                        matched_id = pid
-                if matched_id:
-                    updated[matched_id] = (center, color)
-                    assigned.add(matched_id)
-                else:
-                    max_id += 1
-                    updated[max_id] = (center, color)
-                    assigned.add(max_id)
-            return updated, max_id
-
-        self.tracked_players_team1, self.max_id_team1 = track_players(
-            detected_players_team1, self.tracked_players_team1, self.max_id_team1)
-        self.tracked_players_team2, self.max_id_team2 = track_players(
-            detected_players_team2, self.tracked_players_team2, self.max_id_team2)
-        
-        all_detected_players = detected_players_team1 + detected_players_team2
-
-        
-        self.detect_foul(all_detected_players)
-
-        def draw_players(tracked, detected, team_name):
-            for pid, (center, color) in tracked.items():
-                x1 = y1 = x2 = y2 = None
-                for c, bbox, _ in detected:
-                    if c == center:
-                        x1, y1, x2, y2 = bbox
-                        break
-                if None not in (x1, y1, x2, y2):
-                    cv2.rectangle(self.frame, (x1, y1), (x2, y2), color, 2)
-                    cv2.putText(self.frame, f"{team_name}_P{pid}", (x1, y1 - 5),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-                else:
-                    cv2.circle(self.frame, center, 10, color, 2)
-
-        draw_players(self.tracked_players_team1, detected_players_team1, self.team1)
-        draw_players(self.tracked_players_team2, detected_players_team2, self.team2)
-        self.detect_foul(detected_players_team1 + detected_players_team2)
-
-        
-
-        self.clean_motion()
-        self.shot_detection()
-        self.display_score()
-
-        rgb_image = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
-        qt_image = QImage(rgb_image.data, rgb_image.shape[1], rgb_image.shape[0],
-                          rgb_image.shape[1] * 3, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(qt_image)
-        scaled_pixmap = pixmap.scaled(self.video_label.width(), self.video_label.height(),
-                                      Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.video_label.setPixmap(scaled_pixmap)
-        self.frame_count += 1
-
-    
-    def clean_motion(self):
-        
-        self.ball_pos = [b for b in self.ball_pos if self.frame_count - b[1] < 30]
-        for b in self.ball_pos:
-            cv2.circle(self.frame, b[0], 2, (0, 0, 255), 2)
-        if self.hoop_pos:
-            self.hoop_pos = [h for h in self.hoop_pos if self.frame_count - h[1] < 300]
-            cv2.circle(self.frame, self.hoop_pos[-1][0], 2, (128, 128, 0), 2)
-
-
-    def shot_detection(self):
-        three_point_threshold = 35
-
-        if self.hoop_pos and self.ball_pos:
-            if not self.up:
-                self.up = detect_up(self.ball_pos, self.hoop_pos)
-                if self.up:
-                    self.up_frame = self.frame_count
-                    self.down = False
-                    self.shot_start_hoop_pos = self.hoop_pos[-1][0]
-
-            if self.up and not self.down:
-                self.down = detect_down(self.ball_pos, self.hoop_pos)
-                if self.down:
-                    self.down_frame = self.frame_count
-
-            if self.down:
-                scored = self.improved_score_detection()
-                last_ball_pos = self.ball_pos[-1][0]
-                distance = np.linalg.norm(np.array(last_ball_pos) - np.array(self.shot_start_hoop_pos))
-                points = 3 if distance >= three_point_threshold else 2
-
-                print(f"Distance: {distance:.1f}px")
-                cv2.putText(self.frame, f"Shot type: {'3PT' if points == 3 else '2PT'}", (50, 110),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-
-                if scored:
-                    self.makes += 1
-                    self.overlay_color = (0, 255, 0)
-                    self.overlay_text = f"{points} Points"
-
-                    team_name = self.determine_scoring_team(last_ball_pos)
-                    if team_name == self.team1:
-                        self.score_team1 += points
-                    elif team_name == self.team2:
-                        self.score_team2 += points
-
-                    if team_name:
-                        inserted_team_id = insert_shot_in_db(self.match_id, team_name, points)
-                        if inserted_team_id:
-                            print(f"[DB] {points}-очковый бросок от '{team_name}', ID={inserted_team_id}")
-                else:
-                    self.overlay_color = (0, 0, 255)
-                    self.overlay_text = "Miss"
-
-                self.attempts += 1
-                self.fade_counter = self.fade_frames
-                self.up = self.down = False
-
-        if self.fade_counter > 0:
-            alpha = self.fade_counter / self.fade_frames
-            overlay = self.frame.copy()
-            cv2.rectangle(overlay, (0, 0), (self.frame.shape[1], self.frame.shape[0]), self.overlay_color, -1)
-            cv2.addWeighted(overlay, alpha * 0.4, self.frame, 1 - alpha * 0.4, 0, self.frame)
-
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 2
-            thickness = 4
-
-            text_size, _ = cv2.getTextSize(self.overlay_text, font, font_scale, thickness)
-            text_width, text_height = text_size
-
-            center_x = self.frame.shape[1] // 2
-
-            
-            text_x = center_x - text_width // 2
-            text_y = 50 + text_height
-
-            cv2.putText(self.frame, self.overlay_text, (text_x, text_y),
-                        font, font_scale, (255, 255, 255), thickness)
-            self.fade_counter -= 1
-
-
-    def improved_score_detection(self):
-        if not self.hoop_pos or not self.ball_pos:
-            return False
-
-        hoop_center, _, hoop_w, hoop_h, _ = self.hoop_pos[-1]
-
-        radius = hoop_w * 0.6 
-
-        def point_in_circle(point, center, radius):
-            return (point[0] - center[0]) ** 2 + (point[1] - center[1]) ** 2 < radius ** 2
-
-        ball_positions = [b[0] for b in self.ball_pos[-15:]]
-
-     
-        smoothed_positions = []
-        window_size = 3
-        for i in range(len(ball_positions)):
-            start = max(0, i - window_size + 1)
-            window_points = ball_positions[start:i + 1]
-            avg_x = int(np.mean([p[0] for p in window_points]))
-            avg_y = int(np.mean([p[1] for p in window_points]))
-            smoothed_positions.append((avg_x, avg_y))
-
-        
-        inside_points = [p for p in smoothed_positions if point_in_circle(p, hoop_center, radius)]
-        ball_in_rim = bool(inside_points)
-
-        
-        above = any(p[1] < hoop_center[1] - radius for p in smoothed_positions)
-        below = any(p[1] > hoop_center[1] + radius for p in smoothed_positions)
-
-        
-        if ball_in_rim and above and below:
-            y_positions = [p[1] for p in smoothed_positions]
-            vertical_velocities = np.diff(y_positions)
-            if any(v > 0 for v in vertical_velocities):  
-                return True
-
-        
-        trajectory_score = self.analyze_trajectory()
-        if trajectory_score > 0.75:
-            return True
-
-        return False
-
-
-    def analyze_trajectory(self):
-        if len(self.ball_pos) < 5:
-            return 0.0
-
-        hoop_center, _, hoop_w, hoop_h, _ = self.hoop_pos[-1]
-        rim_top = hoop_center[1] - hoop_h // 2
-        rim_bottom = hoop_center[1] + hoop_h // 4
-        rim_left = hoop_center[0] - hoop_w * 0.4
-        rim_right = hoop_center[0] + hoop_w * 0.4
-
-        points = [ball[0] for ball in self.ball_pos[-10:]]
-        x = [p[0] for p in points]
-        y = [p[1] for p in points]
-
-        try:
-            coeffs = np.polyfit(x, y, 2)
-            a, b, c = coeffs
-
-            for test_x in np.linspace(rim_left, rim_right, 5):
-                pred_y = a * test_x ** 2 + b * test_x + c
-                if rim_top < pred_y < rim_bottom:
-                    return 0.8 
-
-            if y[-1] - y[0] < 0:
-                return 0.0
-
-        except:
-            pass
-
-        above = any(ball[0][1] < rim_top for ball in self.ball_pos[-5:])
-        below = any(ball[0][1] > rim_bottom for ball in self.ball_pos[-5:])
-
-        if above and below:
-            return 0.6
-
-        return 0.0
-
-
-    def determine_scoring_team(self, ball_pos):
-        def find_closest_player(tracked_players):
-            min_dist = float('inf')
-            closest_player = None
-            for pid, (center, _) in tracked_players.items():
-                dist = np.linalg.norm(np.array(center) - np.array(ball_pos))
-                if dist < min_dist:
-                    min_dist = dist
-                    closest_player = (pid, center)
-            return closest_player
-
-        closest1 = find_closest_player(self.tracked_players_team1)
-        closest2 = find_closest_player(self.tracked_players_team2)
-
-        dist1 = np.linalg.norm(np.array(closest1[1]) - np.array(ball_pos)) if closest1 else float('inf')
-        dist2 = np.linalg.norm(np.array(closest2[1]) - np.array(ball_pos)) if closest2 else float('inf')
-
-        if dist1 <= dist2 and closest1:
-            return self.team1
-        elif closest2:
-            return self.team2
-        return None
-
-    def display_score(self):
-        text1 = f"{self.team1}: {self.score_team1}"
-        text2 = f"{self.team2}: {self.score_team2}"
-        text3 = f"Attempts: {self.attempts}"
-
-        x = 30
-        y_start = 40
-        spacing = 40
-
-        cv2.putText(self.frame, text1, (x, y_start), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-        cv2.putText(self.frame, text2, (x, y_start + spacing), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 255), 2)
-        cv2.putText(self.frame, text3, (x, y_start + spacing * 2), cv2.FONT_HERSHEY_SIMPLEX, 1, (200, 200, 200), 2)
-
-    def closeEvent(self, event):
-        self.cap.release()
-        self.timer.stop()
-        event.accept()
-
-
 class StatsViewer(QWidget):
     def __init__(self, match_id, db_user, db_pass, role):
         super().__init__()
@@ -2002,7 +1095,14 @@ class StatsViewer(QWidget):
             QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке статистики: {e}")
 
     def open_match_viewer(self):
-        self.match_viewer = MatchViewer(self.match_id)
+        # torch, ultralytics и cv2 загружаются только при первом открытии просмотра матча
+        from match_viewer import MatchViewer
+
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            self.match_viewer = MatchViewer(self.match_id)
+        finally:
+            QApplication.restoreOverrideCursor()
         self.match_viewer.show()
 
     def open_editor(self):
@@ -2699,6 +1799,12 @@ class AddMatchWindow(QWidget):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
-    login_window = LoginWindow()
+    login_window = LoginWindow(db_ready=False)
     login_window.show()
+
+    # Ожидание MySQL и создание админа идут в фоне, окно входа показывается сразу
+    db_bootstrap = DbBootstrap()
+    db_bootstrap.status.connect(login_window.set_db_status)
+    db_bootstrap.ready.connect(login_window.on_db_ready)
+    db_bootstrap.start()
     sys.exit(app.exec_())
\ No newline at end of file
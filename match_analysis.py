@@ -0,0 +1,581 @@
+import time
+
+import cv2
+import numpy as np
+
+from basket_utils import detect_down, detect_up
+from db_utils import insert_foul_in_db, insert_shot_in_db, save_team_to_db
+from jersey_features import JerseyFeatures
+from overlay import Overlay
+from ring_buffer import PositionBuffer
+from tracker import PlayerTracker
+
+
+def floor_contact_pairs(boxes):
+    """(a, b) index pairs of person boxes (N, 4) where the top of a is below 55% of b's height, row-major.
+
+    Pairs of identical boxes (including a box with itself) are skipped.
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    mid = boxes[:, 1] + 0.55 * (boxes[:, 3] - boxes[:, 1])
+    below = boxes[:, 1][:, None] >= mid[None, :]
+    same = (boxes[:, None, :] == boxes[None, :, :]).all(axis=2)
+    return np.argwhere(below & ~same)
+
+
+class MatchAnalyzer:
+    """Per-frame shot and foul detection for one match, independent of Qt.
+
+    The viewer and the headless analyzer feed it decoded frames together
+    with the model detections; with draw=True boxes, labels and banners are
+    recorded in self.overlay for the viewer to paint (the frame itself is
+    never modified), with write_db=False events are only
+    collected in self.events. With a HoopLock the hoop box comes from the
+    lock instead of per-frame detections whenever the lock holds. With a
+    BallTracker only the detection that fits the ball's track is kept and
+    short gaps are filled with predicted positions (measured=False).
+    With a StageTimer the time of team assignment, tracking, foul and
+    shot detection is recorded per frame.
+    """
+
+    def __init__(self, match_id, team1, team2, draw=True, write_db=True, hoop_lock=None, ball_tracker=None,
+                 timer=None):
+        self.match_id = match_id
+        self.team1 = team1
+        self.team2 = team2
+        self.draw = draw
+        self.write_db = write_db
+        self.hoop_lock = hoop_lock
+        self.ball_tracker = ball_tracker
+        self.timer = timer
+        self.events = []
+
+        self.team_colors = {}
+        self.team_colors_history = {self.team1: [], self.team2: []}
+        self.max_color_history = 10
+
+        self.class_names_obj = ['Basketball', 'Basketball Hoop']
+        self.overlay = Overlay()
+        self.jersey = None
+        self.frame = None
+        self.current_frame = 0
+
+        self.frame_count = 0
+        self.makes = 0
+        self.attempts = 0
+        self.score_team1 = 0
+        self.score_team2 = 0
+        self.ball_pos = PositionBuffer(128)
+        self.hoop_pos = PositionBuffer(64)
+        self.last_ball_frame = -1
+        self.up = False
+        self.down = False
+        self.tracked_players_team1 = {}
+        self.tracked_players_team2 = {}
+        self.max_tracking_distance = 50
+        self.tracker_team1 = PlayerTracker(max_distance=self.max_tracking_distance)
+        self.tracker_team2 = PlayerTracker(max_distance=self.max_tracking_distance)
+
+        self.fade_frames = 20
+        self.fade_counter = 0
+        self.overlay_color = (0, 0, 0)
+        self.overlay_text = "..."
+
+        self.foul_overlay_color = (0, 0, 255)
+        self.foul_overlay_text = ""
+        self.foul_fade_counter = 0
+        self.foul_fade_frames = 30
+
+        self.foul_candidates = 0
+        self.foul_check_ms = 0.0
+        self.foul_checks = 0
+        self.foul_check_total_ms = 0.0
+        self.foul_candidates_total = 0
+        self.db_latency_ms = {}
+
+    def process_frame(self, frame, frame_index, detections_obj, detections_person):
+        """Run tracking, foul and shot detection on one decoded frame."""
+        self.frame = frame
+        self.current_frame = frame_index
+        timer = self.timer
+        if timer:
+            start = time.perf_counter()
+
+        frame_height, frame_width = self.frame.shape[:2]
+        if self.draw:
+            self.overlay.clear((frame_width, frame_height))
+        hoop_detections = []
+        ball_detections = []
+        for x1, y1, x2, y2, conf, cls in detections_obj:
+            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+            w, h = x2 - x1, y2 - y1
+            conf = float(conf)
+            label = self.class_names_obj[int(cls)]
+            center = (x1 + w // 2, y1 + h // 2)
+
+            if label == "Basketball" and conf > 0.15:
+                if self.ball_tracker:
+                    ball_detections.append((center[0], center[1], w, h, conf))
+                else:
+                    self.ball_pos.append(center[0], center[1], self.frame_count, w, h, conf)
+                    self.last_ball_frame = self.frame_count
+                if self.draw:
+                    self.overlay.rect(x1, y1, x2, y2, (0, 0, 255))
+
+            if label == "Basketball Hoop" and conf > 0.3:
+                hoop_detections.append((center, self.frame_count, w, h, conf))
+                if self.draw:
+                    self.overlay.rect(x1, y1, x2, y2, (0, 140, 255))
+
+        hoop_box = None
+        if self.hoop_lock:
+            hoop_box = self.hoop_lock.update(self.frame, [(c[0], c[1], w, h, conf)
+                                                          for c, _, w, h, conf in hoop_detections],
+                                             self.current_frame)
+        if hoop_box:
+            # Кольцо зафиксировано: вся геометрия броска считается от одного стабильного бокса
+            cx, cy, w, h = hoop_box
+            self.hoop_pos.clear()
+            self.hoop_pos.append(int(cx), int(cy), self.frame_count, int(w), int(h), 1.0)
+            if self.draw:
+                self.overlay.rect(int(cx - w / 2), int(cy - h / 2), int(cx + w / 2), int(cy + h / 2), (0, 140, 255))
+        else:
+            for (cx, cy), frame_number, w, h, conf in hoop_detections:
+                self.hoop_pos.append(cx, cy, frame_number, w, h, conf)
+
+        if self.ball_tracker:
+            self.track_ball(ball_detections)
+
+        if timer:
+            start = timer.since("detections", start)
+
+        detected_players_team1, detected_players_team2 = [], []
+
+        candidates = []
+        for x1, y1, x2, y2, conf, _ in detections_person:
+            x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
+            conf = float(conf)
+            if conf < 0.4:
+                continue
+
+            w, h = x2 - x1, y2 - y1
+            center = ((x1 + x2) // 2, (y1 + y2) // 2)
+
+            
+            if center[1] < frame_height * 0.4:
+                continue
+            if center[0] < frame_width * 0.05 or center[0] > frame_width * 0.95:
+                continue
+            if w * h < 2000:
+                continue
+            candidates.append((center, (x1, y1, x2, y2)))
+
+        # HSV и медианы цвета формы считаются один раз на кадр для всех игроков, detect_foul берёт их из кэша
+        self.jersey = JerseyFeatures(self.frame, [bbox for _, bbox in candidates])
+
+        for center, (x1, y1, x2, y2) in candidates:
+            avg_hsv = self.jersey.get((x1, y1, x2, y2))
+            if avg_hsv is None:
+                continue
+
+           
+            if self.team1 not in self.team_colors:
+                self.team_colors_history[self.team1].append(avg_hsv)
+                self.team_colors[self.team1] = self.average_hsv_history(self.team_colors_history[self.team1])
+                self.save_team_to_db(self.team1, self.team_colors[self.team1])
+            elif self.team2 not in self.team_colors and avg_hsv != self.team_colors.get(self.team1, ()):
+                self.team_colors_history[self.team2].append(avg_hsv)
+                self.team_colors[self.team2] = self.average_hsv_history(self.team_colors_history[self.team2])
+                self.save_team_to_db(self.team2, self.team_colors[self.team2])
+            else:
+                
+                dist1 = self.hsv_distance(avg_hsv, self.team_colors.get(self.team1, (0, 0, 0)))
+                dist2 = self.hsv_distance(avg_hsv, self.team_colors.get(self.team2, (0, 0, 0)))
+
+                if dist1 <= dist2:
+                    self.team_colors_history[self.team1].append(avg_hsv)
+                    if len(self.team_colors_history[self.team1]) > self.max_color_history:
+                        self.team_colors_history[self.team1].pop(0)
+                    self.team_colors[self.team1] = self.average_hsv_history(self.team_colors_history[self.team1])
+                else:
+                    self.team_colors_history[self.team2].append(avg_hsv)
+                    if len(self.team_colors_history[self.team2]) > self.max_color_history:
+                        self.team_colors_history[self.team2].pop(0)
+                    self.team_colors[self.team2] = self.average_hsv_history(self.team_colors_history[self.team2])
+
+            
+            dist1 = self.hsv_distance(avg_hsv, self.team_colors.get(self.team1, (0, 0, 0)))
+            dist2 = self.hsv_distance(avg_hsv, self.team_colors.get(self.team2, (0, 0, 0)))
+
+            if dist1 <= dist2:
+                color = (0, 140, 255)
+                detected_players_team1.append((center, (x1, y1, x2, y2), color))
+            else:
+                color = (255, 0, 0)
+                detected_players_team2.append((center, (x1, y1, x2, y2), color))
+
+        if timer:
+            timer.since("teams", start)
+
+        if self.draw and self.foul_fade_counter > 0:
+            alpha = self.foul_fade_counter / self.foul_fade_frames
+            self.overlay.rect(0, 0, frame_width, 80, self.foul_overlay_color, width=-1, alpha=alpha * 0.4)
+
+            font = cv2.FONT_HERSHEY_SIMPLEX
+            font_scale = 2
+            thickness = 4
+
+            text_size, _ = cv2.getTextSize(self.foul_overlay_text, font, font_scale, thickness)
+            text_height = text_size[1]
+            center_x = frame_width // 2
+
+            text_y = 50 + text_height // 2
+
+            self.overlay.text(center_x, text_y, self.foul_overlay_text, (255, 255, 255), font_scale, thickness,
+                              centered=True)
+
+            self.foul_fade_counter -= 1
+
+        # Трекинг выполняется один раз за кадр: оптимальное назначение с прогнозом по скорости
+        if timer:
+            start = time.perf_counter()
+        self.tracked_players_team1 = self.tracker_team1.update(detected_players_team1)
+        self.tracked_players_team2 = self.tracker_team2.update(detected_players_team2)
+        if timer:
+            start = timer.since("tracking", start)
+
+        all_detected_players = detected_players_team1 + detected_players_team2
+
+        
+        self.detect_foul(all_detected_players)
+        if timer:
+            timer.since("fouls", start)
+
+        def draw_players(tracked, detected, team_name):
+            for pid, (center, color) in tracked.items():
+                x1 = y1 = x2 = y2 = None
+                for c, bbox, _ in detected:
+                    if c == center:
+                        x1, y1, x2, y2 = bbox
+                        break
+                if None not in (x1, y1, x2, y2):
+                    self.overlay.rect(x1, y1, x2, y2, color)
+                    self.overlay.text(x1, y1 - 5, f"{team_name}_P{pid}", color, 0.5, 1)
+                else:
+                    self.overlay.circle(center, 10, color)
+
+        if self.draw:
+            draw_players(self.tracked_players_team1, detected_players_team1, self.team1)
+            draw_players(self.tracked_players_team2, detected_players_team2, self.team2)
+
+        
+
+        if timer:
+            start = time.perf_counter()
+        self.clean_motion()
+        self.shot_detection()
+        if timer:
+            timer.since("shots", start)
+        if self.draw:
+            self.display_score()
+
+        self.frame_count += 1
+
+    def track_ball(self, detections):
+        """Pass this frame's ball detections through the tracker and record the resulting point."""
+        point = self.ball_tracker.update(self.frame_count, detections)
+        if point is None:
+            return
+        x, y, w, h, conf, measured = point
+        self.ball_pos.append(x, y, self.frame_count, w, h, conf, measured)
+        if measured:
+            self.last_ball_frame = self.frame_count
+
+    def ball_search_region(self):
+        """Box around the hoop covering the detect_up and detect_down zones, or None while the hoop is unknown."""
+        if not self.hoop_pos:
+            return None
+        hx, hy, hw, hh = self.hoop_pos.box()
+        return (hx - 3 * hw, hy - 3 * hh, hx + 3 * hw, hy + 2 * hh)
+
+    def ball_lost(self, frames):
+        return self.frame_count - self.last_ball_frame > frames
+
+    def save_team_to_db(self, name, hsv):
+        if self.write_db:
+            save_team_to_db(name, hsv)
+
+    def hsv_distance(self, hsv1, hsv2):
+        return np.linalg.norm(np.array(hsv1) - np.array(hsv2))
+
+    def average_hsv_history(self, hsv_list):
+        """Вычислить усреднённое HSV из списка кортежей."""
+        if not hsv_list:
+            return (0, 0, 0)
+        arr = np.array(hsv_list)
+        mean_hsv = tuple(np.median(arr, axis=0).astype(int))
+        return mean_hsv
+
+
+    def detect_foul(self, all_detected_players):
+        self.foul_candidates = 0
+        self.foul_check_ms = 0.0
+        if len(all_detected_players) < 2:
+            return
+
+        current_frame = self.current_frame
+
+        if hasattr(self, "last_foul_frame") and (current_frame - self.last_foul_frame < 30):
+            return
+
+        start = time.perf_counter()
+        boxes = [bbox for _, bbox, _ in all_detected_players]
+        # Все пары игроков проверяются разом, цвет формы смотрится только у прошедших проверку
+        pairs = floor_contact_pairs(boxes)
+        self.foul_candidates = len(pairs)
+        self.foul_candidates_total += len(pairs)
+
+        foul_team = None
+        for a in pairs[:, 0].tolist():
+            player_hsv = self.jersey.get(boxes[a])
+            if player_hsv is None:
+                continue
+
+            dist1 = self.hsv_distance(player_hsv, self.team_colors.get(self.team1, (0, 0, 0)))
+            dist2 = self.hsv_distance(player_hsv, self.team_colors.get(self.team2, (0, 0, 0)))
+
+            foul_team = self.team2 if dist1 < dist2 else self.team1
+            break
+
+        self.foul_check_ms = 1000.0 * (time.perf_counter() - start)
+        self.foul_checks += 1
+        self.foul_check_total_ms += self.foul_check_ms
+        if foul_team is None:
+            return
+
+        self.events.append({"type": "foul", "frame": current_frame, "team": foul_team})
+        if self.write_db:
+            db_start = time.perf_counter()
+            insert_foul_in_db(self.match_id, foul_team)
+            self.db_latency_ms["foul"] = 1000.0 * (time.perf_counter() - db_start)
+        print(f"[ФОЛ] Нарушение со стороны: команда '{foul_team}' (игрок на полу)")
+
+        self.last_foul_frame = current_frame
+
+        self.foul_overlay_color = (0, 0, 255)
+        self.foul_overlay_text = f"Foul by {foul_team}"
+        self.foul_fade_counter = self.foul_fade_frames
+
+    def metrics(self):
+        return {
+            "foul_candidates": self.foul_candidates,
+            "foul_check_ms": self.foul_check_ms,
+            "avg_foul_candidates": self.foul_candidates_total / self.foul_checks if self.foul_checks else 0.0,
+            "avg_foul_check_ms": self.foul_check_total_ms / self.foul_checks if self.foul_checks else 0.0,
+        }
+
+    def clean_motion(self):
+        
+        self.ball_pos.expire_before(self.frame_count - 29)
+        if self.draw:
+            balls = self.ball_pos.view()
+            for x, y, measured in zip(balls["x"].tolist(), balls["y"].tolist(), balls["measured"].tolist()):
+                # Предсказанные трекером точки рисуются другим цветом
+                self.overlay.circle((x, y), 2, (0, 0, 255) if measured else (0, 255, 255))
+        if self.hoop_pos:
+            self.hoop_pos.expire_before(self.frame_count - 299)
+            if self.draw and self.hoop_pos:
+                self.overlay.circle(self.hoop_pos.center(), 2, (128, 128, 0))
+
+
+    def shot_detection(self):
+        three_point_threshold = 35
+
+        if self.hoop_pos and self.ball_pos:
+            if not self.up:
+                self.up = detect_up(self.ball_pos, self.hoop_pos)
+                if self.up:
+                    self.up_frame = self.frame_count
+                    self.down = False
+                    self.shot_start_hoop_pos = self.hoop_pos.center()
+
+            if self.up and not self.down:
+                self.down = detect_down(self.ball_pos, self.hoop_pos)
+                if self.down:
+                    self.down_frame = self.frame_count
+
+            if self.down:
+                scored = self.improved_score_detection()
+                last_ball_pos = self.ball_pos.center()
+                distance = np.linalg.norm(np.array(last_ball_pos) - np.array(self.shot_start_hoop_pos))
+                points = 3 if distance >= three_point_threshold else 2
+
+                print(f"Distance: {distance:.1f}px")
+                if self.draw:
+                    self.overlay.text(50, 110, f"Shot type: {'3PT' if points == 3 else '2PT'}", (255, 255, 0), 0.7)
+
+                team_name = None
+
+                if scored:
+                    self.makes += 1
+                    self.overlay_color = (0, 255, 0)
+                    self.overlay_text = f"{points} Points"
+
+                    team_name = self.determine_scoring_team(last_ball_pos)
+                    if team_name == self.team1:
+                        self.score_team1 += points
+                    elif team_name == self.team2:
+                        self.score_team2 += points
+
+                    if team_name and self.write_db:
+                        db_start = time.perf_counter()
+                        inserted_team_id = insert_shot_in_db(self.match_id, team_name, points)
+                        self.db_latency_ms["shot"] = 1000.0 * (time.perf_counter() - db_start)
+                        if inserted_team_id:
+                            print(f"[DB] {points}-очковый бросок от '{team_name}', ID={inserted_team_id}")
+                else:
+                    self.overlay_color = (0, 0, 255)
+                    self.overlay_text = "Miss"
+
+                self.events.append({"type": "shot", "frame": self.current_frame, "team": team_name,
+                                    "points": points if scored else 0})
+                self.attempts += 1
+                self.fade_counter = self.fade_frames
+                self.up = self.down = False
+
+        if self.draw and self.fade_counter > 0:
+            alpha = self.fade_counter / self.fade_frames
+            frame_height, frame_width = self.frame.shape[:2]
+            self.overlay.rect(0, 0, frame_width, frame_height, self.overlay_color, width=-1, alpha=alpha * 0.4)
+
+            font = cv2.FONT_HERSHEY_SIMPLEX
+            font_scale = 2
+            thickness = 4
+
+            text_size, _ = cv2.getTextSize(self.overlay_text, font, font_scale, thickness)
+            text_height = text_size[1]
+
+            center_x = frame_width // 2
+
+            
+            text_y = 50 + text_height
+
+            self.overlay.text(center_x, text_y, self.overlay_text, (255, 255, 255), font_scale, thickness,
+                              centered=True)
+            self.fade_counter -= 1
+
+
+    def improved_score_detection(self):
+        if not self.hoop_pos or not self.ball_pos:
+            return False
+
+        hx, hy, hoop_w, hoop_h = self.hoop_pos.box()
+
+        radius = hoop_w * 0.6 
+
+        recent = self.ball_pos.view()[-15:]
+
+        # Скользящее среднее по 3 последним точкам (в начале окно короче), с отбрасыванием дробной части
+        window_size = 3
+        counts = np.minimum(np.arange(1, len(recent) + 1), window_size)
+        smoothed = []
+        for column in (recent["x"], recent["y"]):
+            cum = np.concatenate([[0], np.cumsum(column, dtype=np.int64)])
+            sums = cum[1:] - cum[np.arange(len(recent)) + 1 - counts]
+            smoothed.append(np.trunc(sums / counts).astype(np.int64))
+        sx, sy = smoothed
+
+        
+        ball_in_rim = bool(np.any((sx - hx) ** 2 + (sy - hy) ** 2 < radius ** 2))
+
+        
+        above = bool(np.any(sy < hy - radius))
+        below = bool(np.any(sy > hy + radius))
+
+        
+        if ball_in_rim and above and below:
+            if np.any(np.diff(sy) > 0):  
+                return True
+
+        
+        trajectory_score = self.analyze_trajectory()
+        if trajectory_score > 0.75:
+            return True
+
+        return False
+
+
+    def analyze_trajectory(self):
+        if len(self.ball_pos) < 5:
+            return 0.0
+
+        hx, hy, hoop_w, hoop_h = self.hoop_pos.box()
+        rim_top = hy - hoop_h // 2
+        rim_bottom = hy + hoop_h // 4
+        rim_left = hx - hoop_w * 0.4
+        rim_right = hx + hoop_w * 0.4
+
+        points = self.ball_pos.view()[-10:]
+        x = points["x"].astype(np.float64)
+        y = points["y"].astype(np.int64)
+
+        try:
+            coeffs = np.polyfit(x, y, 2)
+            a, b, c = coeffs
+
+            for test_x in np.linspace(rim_left, rim_right, 5):
+                pred_y = a * test_x ** 2 + b * test_x + c
+                if rim_top < pred_y < rim_bottom:
+                    return 0.8 
+
+            if y[-1] - y[0] < 0:
+                return 0.0
+
+        except:
+            pass
+
+        last_y = self.ball_pos.view()["y"][-5:]
+        above = bool(np.any(last_y < rim_top))
+        below = bool(np.any(last_y > rim_bottom))
+
+        if above and below:
+            return 0.6
+
+        return 0.0
+
+
+    def determine_scoring_team(self, ball_pos):
+        def find_closest_player(tracked_players):
+            min_dist = float('inf')
+            closest_player = None
+            for pid, (center, _) in tracked_players.items():
+                dist = np.linalg.norm(np.array(center) - np.array(ball_pos))
+                if dist < min_dist:
+                    min_dist = dist
+                    closest_player = (pid, center)
+            return closest_player
+
+        closest1 = find_closest_player(self.tracked_players_team1)
+        closest2 = find_closest_player(self.tracked_players_team2)
+
+        dist1 = np.linalg.norm(np.array(closest1[1]) - np.array(ball_pos)) if closest1 else float('inf')
+        dist2 = np.linalg.norm(np.array(closest2[1]) - np.array(ball_pos)) if closest2 else float('inf')
+
+        if dist1 <= dist2 and closest1:
+            return self.team1
+        elif closest2:
+            return self.team2
+        return None
+
+    def display_score(self):
+        text1 = f"{self.team1}: {self.score_team1}"
+        text2 = f"{self.team2}: {self.score_team2}"
+        text3 = f"Attempts: {self.attempts}"
+
+        x = 30
+        y_start = 40
+        spacing = 40
+
+        self.overlay.text(x, y_start, text1, (0, 255, 255))
+        self.overlay.text(x, y_start + spacing, text2, (0, 255, 255))
+        self.overlay.text(x, y_start + spacing * 2, text3, (200, 200, 200))
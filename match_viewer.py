@@ -0,0 +1,276 @@
+import time
+
+import torch
+from PyQt5.QtCore import QSize, Qt, QTimer
+from PyQt5.QtWidgets import QApplication, QHBoxLayout, QLabel, QPushButton, QSlider, QStyle, QVBoxLayout, QWidget
+
+from ball_tracker import BallTracker
+from db_utils import get_match
+from display import FrameScaler, render_frame
+from frame_reader import FrameReader
+from hoop_lock import HoopLock
+from inference import BatchInference, HoopRoiPolicy, load_models, open_detection_cache, release_models
+from keyframe_index import ScrubPreview
+from match_analysis import MatchAnalyzer
+from perf_hud import PerfHud
+from playback_clock import ANALYZE_ONLY, SHOW, WAIT, PlaybackClock
+
+
+class MatchViewer(QWidget):
+    TICK_MS = 5
+    TICK_BUDGET_MS = 50
+    def __init__(self, match_id, batch_size=1, max_batch_latency_ms=0, parallel_models=True, hoop_roi=False,
+                 hoop_lock=False, backend="torch", detection_cache=True, ball_tracker=False):
+        super().__init__()
+        self.match_id = match_id
+
+        result = get_match(self.match_id)
+        video_path = result['video_path'] if result else 'model/video_test_8.mp4'
+        self.team1 = result['team1']
+        self.team2 = result['team2']
+
+        
+        self.setWindowTitle("Просмотр матча")
+        self.showFullScreen()
+        self.is_fullscreen = True
+
+        self.setStyleSheet("""
+            background-color: #1c1c1e;
+            color: #eaeaea;
+            font-family: Arial, sans-serif;
+            font-size: 16px;
+        """)
+
+        self.layout = QVBoxLayout()
+        self.layout.setContentsMargins(15, 15, 15, 15)
+        self.layout.setSpacing(15)
+        self.setLayout(self.layout)
+
+        self.video_label = QLabel()
+        self.video_label.setStyleSheet("background-color: black; border-radius: 8px;")
+        self.video_label.setAlignment(Qt.AlignCenter)
+        self.layout.addWidget(self.video_label, stretch=1)
+        # Панель производительности поверх видео, переключается клавишей F3
+        self.hud = PerfHud(self.video_label)
+
+        
+        self.backend = backend
+        self.device = 'cuda' if torch.cuda.is_available() else 'cpu'
+        self.model_object, self.model_person = load_models(self.device, backend)
+        self.analyzer = MatchAnalyzer(self.match_id, self.team1, self.team2,
+                                      hoop_lock=HoopLock(video_path) if hoop_lock else None,
+                                      ball_tracker=BallTracker() if ball_tracker else None)
+        self.reader = FrameReader(video_path, capacity=32, stride=2, keyframe_index=True)
+        self.scrub_preview = ScrubPreview(video_path)
+        self.clock = PlaybackClock()
+        self.inference = BatchInference(self.reader, self.model_object, self.model_person, self.device,
+                                        batch_size=batch_size, max_latency_ms=max_batch_latency_ms,
+                                        parallel_models=parallel_models,
+                                        roi_policy=HoopRoiPolicy(self.analyzer) if hoop_roi else None,
+                                        hoop_lock=self.analyzer.hoop_lock,
+                                        cache=open_detection_cache(video_path, self.reader.frame_count, backend,
+                                                                   hoop_roi=hoop_roi, hoop_lock=hoop_lock)
+                                        if detection_cache else None, clock=self.clock)
+        self.current_frame = 0
+        self.scaler = FrameScaler()
+        self.next_item = None
+
+        # Таймер только опрашивает часы, моменты показа задают метки времени кадров
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_frame)
+        self.timer.start(self.TICK_MS)
+        
+
+        
+        self.controls_layout = QHBoxLayout()
+        self.controls_layout.setSpacing(20)
+
+        btn_style = """
+            QPushButton {
+                background-color: #9400d3;
+                color: white;
+                border-radius: 10px;
+                padding: 10px;
+                font-weight: bold;
+                font-size: 16px;
+                min-width: 120px;
+            }
+            QPushButton:hover {
+                background-color: #b759e0;
+            }
+            QPushButton:pressed {
+                background-color: #7a00b8;
+            }
+        """
+
+        self.play_button = QPushButton("▶️ Play")
+        self.pause_button = QPushButton("⏸ Pause")
+        self.seek_backward_button = QPushButton("⏪ Backward")
+        self.seek_forward_button = QPushButton("⏩ Forward")
+
+        for btn in [self.play_button, self.pause_button, self.seek_backward_button, self.seek_forward_button]:
+            btn.setStyleSheet(btn_style)
+
+        
+        style = QApplication.style()
+        self.icon_fullscreen = style.standardIcon(QStyle.SP_TitleBarMaxButton)
+        self.icon_exit_fullscreen = style.standardIcon(QStyle.SP_TitleBarNormalButton)
+
+        self.toggle_fullscreen_btn = QPushButton()
+        self.toggle_fullscreen_btn.setIcon(self.icon_exit_fullscreen)
+        self.toggle_fullscreen_btn.setIconSize(QSize(24, 24))
+        self.toggle_fullscreen_btn.setFixedSize(40, 40)
+        self.toggle_fullscreen_btn.setStyleSheet("background-color: transparent; border: none;")
+        self.toggle_fullscreen_btn.setToolTip("Переключить полноэкранный режим")
+
+        self.controls_layout.addWidget(self.seek_backward_button)
+        self.controls_layout.addWidget(self.pause_button)
+        self.controls_layout.addWidget(self.play_button)
+        self.controls_layout.addWidget(self.seek_forward_button)
+        self.controls_layout.addWidget(self.toggle_fullscreen_btn)
+
+        self.layout.addLayout(self.controls_layout)
+
+        self.play_button.clicked.connect(self.play_video)
+        self.pause_button.clicked.connect(self.pause_video)
+        self.seek_forward_button.clicked.connect(self.seek_forward)
+        self.seek_backward_button.clicked.connect(self.seek_backward)
+        self.toggle_fullscreen_btn.clicked.connect(self.toggle_fullscreen)
+
+        self.is_playing = True
+
+        
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setMinimum(0)
+        self.slider.setMaximum(self.reader.frame_count - 1)
+        self.slider.sliderPressed.connect(self.slider_pressed)
+        self.slider.sliderReleased.connect(self.slider_released)
+        self.slider.sliderMoved.connect(self.slider_moved)
+
+        self.layout.addWidget(self.slider)
+        self.slider_is_pressed = False
+
+        
+    def play_video(self):
+        if not self.is_playing:
+            self.clock.reset()
+            self.timer.start(self.TICK_MS)
+            self.is_playing = True
+
+    def pause_video(self):
+        if self.is_playing:
+            self.timer.stop()
+            self.is_playing = False
+
+    def seek_forward(self):
+        new_frame = self.current_frame + 30
+        total_frames = self.reader.frame_count
+        if new_frame >= total_frames:
+            new_frame = total_frames - 1
+        self.seek(new_frame)
+        self.update_frame(timeout=0.5)
+
+    def seek_backward(self):
+        new_frame = self.current_frame - 30
+        if new_frame < 0:
+            new_frame = 0
+        self.seek(new_frame)
+        self.update_frame(timeout=0.5)
+
+    def seek(self, index):
+        self.next_item = None
+        self.clock.reset()
+        self.inference.seek(index)
+
+    def slider_pressed(self):
+        self.slider_is_pressed = True
+        self.pause_video()
+
+    def slider_moved(self, value):
+        # Пока ползунок тянут, показываем ближайший ключевой кадр без анализа
+        if self.reader.keyframes is None:
+            return
+        preview = self.scrub_preview.frame_at(value, self.reader.keyframes)
+        if preview is not None:
+            self.show_frame(preview[1])
+
+    def slider_released(self):
+        new_pos = self.slider.value()
+        self.seek(new_pos)
+        self.slider_is_pressed = False
+        self.play_video()
+
+    def toggle_fullscreen(self):
+        if self.is_fullscreen:
+            self.showNormal()
+            self.is_fullscreen = False
+            self.toggle_fullscreen_btn.setIcon(self.icon_fullscreen)
+            self.toggle_fullscreen_btn.setToolTip("🗖")
+        else:
+            self.showFullScreen()
+            self.is_fullscreen = True
+            self.toggle_fullscreen_btn.setIcon(self.icon_exit_fullscreen)
+            self.toggle_fullscreen_btn.setToolTip("🗖")
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape and self.is_fullscreen:
+            self.toggle_fullscreen()
+        elif event.key() == Qt.Key_F3:
+            self.toggle_hud()
+        else:
+            super().keyPressEvent(event)
+
+    def toggle_hud(self):
+        # Пока панель скрыта, этапы конвейера не замеряются вовсе
+        if self.hud.active:
+            self.hud.hide_hud()
+        else:
+            self.hud.show_hud()
+        self.reader.timer = self.inference.timer = self.analyzer.timer = self.hud.timer
+
+    def update_frame(self, timeout=0.0):
+        # Декодирование идёт в отдельном потоке, GUI не ждёт VideoCapture
+        deadline = time.perf_counter() + self.TICK_BUDGET_MS / 1000.0
+        while True:
+            item = self.next_item or self.inference.next(timeout)
+            if item is None:
+                if self.inference.finished():
+                    self.timer.stop()
+                return
+
+            action = self.clock.decide(item[0].timestamp_ms)
+            if action == WAIT:
+                self.next_item = item
+                return
+            self.next_item = None
+            self.present(item, action)
+            # Опоздавшие кадры догоняем в том же тике, но не дольше TICK_BUDGET_MS
+            if action == SHOW or time.perf_counter() > deadline:
+                return
+
+    def present(self, item, action):
+        decoded, detections_obj, detections_person = item
+        self.current_frame = decoded.index
+        self.slider.setValue(self.current_frame)
+
+        self.frame = decoded.image
+        self.analyzer.process_frame(self.frame, self.current_frame, detections_obj, detections_person)
+        if action != ANALYZE_ONLY:
+            self.show_frame(self.frame, self.analyzer.overlay)
+            if self.hud.active:
+                self.hud.frame_shown()
+                self.hud.refresh(self.backend, self.device, self.reader, self.inference, self.clock, self.analyzer)
+
+    def show_frame(self, frame, overlay=None):
+        pixmap = render_frame(self.scaler, frame, overlay, self.video_label.width(), self.video_label.height(),
+                              self.hud.timer)
+        self.video_label.setPixmap(pixmap)
+
+    
+    def closeEvent(self, event):
+        self.timer.stop()
+        self.inference.close()
+        self.reader.release()
+        self.scrub_preview.release()
+        release_models(self.model_object, self.model_person)
+        event.accept()
@@ -0,0 +1,116 @@
+import threading
+import time
+
+import torch
+from ultralytics import YOLO
+
+
+class SharedModel:
+    """A loaded YOLO model shared between windows; calls are serialized by a per-model lock."""
+
+    def __init__(self, path, device):
+        self.path = path
+        self.device = device
+        self.model = YOLO(path)
+        if path.endswith(".pt"):
+            # Экспортированные модели (ONNX, OpenVINO) выбирают устройство сами при вызове
+            self.model.to(device)
+        self.lock = threading.Lock()
+        self.users = 0
+        self.released_at = None
+
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            return self.model(*args, **kwargs)
+
+
+class ModelRegistry:
+    """Load each weight file once per device and hand the same model to every user.
+
+    acquire() returns a shared model and bumps its reference count;
+    release() drops it. A model nobody uses is kept for idle_timeout
+    seconds so reopening a match does not reload it, then evicted.
+    Weights are loaded outside the registry lock: concurrent callers for
+    the same key wait on that key's loading event, others are not blocked.
+    """
+
+    def __init__(self, idle_timeout=300.0):
+        self.idle_timeout = idle_timeout
+        self.models = {}
+        self.loading = {}
+        self.lock = threading.Lock()
+        self.timer = None
+        self.loads = 0
+        self.hits = 0
+
+    def acquire(self, path, device):
+        key = (path, str(device))
+        while True:
+            with self.lock:
+                shared = self.models.get(key)
+                if shared is not None:
+                    self.hits += 1
+                    return self._take(shared)
+                loaded = self.loading.get(key)
+                if loaded is None:
+                    loaded = self.loading[key] = threading.Event()
+                    break
+            # Модель уже грузит другой поток; если загрузка упадёт, следующий круг начнёт её заново
+            loaded.wait()
+
+        shared = None
+        try:
+            shared = SharedModel(path, device)
+        finally:
+            with self.lock:
+                del self.loading[key]
+                if shared is not None:
+                    self.models[key] = shared
+                    self.loads += 1
+                    self._take(shared)
+            loaded.set()
+        return shared
+
+    def _take(self, shared):
+        shared.users += 1
+        shared.released_at = None
+        return shared
+
+    def release(self, shared):
+        with self.lock:
+            shared.users = max(0, shared.users - 1)
+            if shared.users == 0:
+                shared.released_at = time.monotonic()
+                self._schedule_eviction()
+
+    def _schedule_eviction(self):
+        if self.timer is None:
+            self.timer = threading.Timer(self.idle_timeout, self._evict_idle)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _evict_idle(self):
+        with self.lock:
+            self.timer = None
+            now = time.monotonic()
+            evicted = [key for key, shared in self.models.items()
+                       if shared.users == 0 and now - shared.released_at >= self.idle_timeout]
+            for key in evicted:
+                del self.models[key]
+            if any(shared.users == 0 for shared in self.models.values()):
+                self._schedule_eviction()
+
+        if any(device.startswith("cuda") for _, device in evicted) and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    def metrics(self):
+        with self.lock:
+            return {
+                "loaded": len(self.models),
+                "in_use": sum(1 for shared in self.models.values() if shared.users),
+                "loads": self.loads,
+                "hits": self.hits,
+            }
+
+
+registry = ModelRegistry()
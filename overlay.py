@@ -0,0 +1,34 @@
+from collections import namedtuple
+
+
+Rect = namedtuple("Rect", ["x1", "y1", "x2", "y2", "color", "width", "alpha"])
+Circle = namedtuple("Circle", ["x", "y", "radius", "color", "width"])
+Text = namedtuple("Text", ["x", "y", "text", "color", "scale", "thickness", "centered"])
+
+
+class Overlay:
+    """Vector overlay of one frame in source-frame coordinates.
+
+    The analyzer records boxes, labels and banners here instead of burning
+    them into the frame; the viewer paints them at display resolution on
+    top of the video. Colours are BGR like everywhere else in the analysis
+    code. Rect with width=-1 is filled, blended with the given alpha.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.frame_size = None
+
+    def clear(self, frame_size):
+        self.items = []
+        self.frame_size = frame_size
+
+    def rect(self, x1, y1, x2, y2, color, width=2, alpha=1.0):
+        self.items.append(Rect(x1, y1, x2, y2, color, width, alpha))
+
+    def circle(self, center, radius, color, width=2):
+        self.items.append(Circle(center[0], center[1], radius, color, width))
+
+    def text(self, x, y, text, color, scale=1.0, thickness=2, centered=False):
+        """Text with its baseline at y, starting at x (or centered on x)."""
+        self.items.append(Text(x, y, text, color, scale, thickness, centered))
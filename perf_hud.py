@@ -0,0 +1,90 @@
+import time
+from collections import deque
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QLabel
+
+from stage_timer import STAGES, StageTimer
+
+
+class PerfHud(QLabel):
+    """Toggleable performance panel drawn over the video.
+
+    While hidden it holds no StageTimer, so the pipeline records nothing
+    and the panel costs nothing. show_hud() creates a rolling StageTimer
+    for the viewer to hand to the reader, inference and analyzer;
+    frame_shown() feeds the FPS window, and refresh() rebuilds the text
+    at most every refresh_s seconds.
+    """
+
+    def __init__(self, parent, window=120, refresh_s=0.25):
+        super().__init__(parent)
+        self.window = window
+        self.refresh_s = refresh_s
+        self.timer = None
+        self.shown_at = deque(maxlen=window)
+        self.last_refresh = 0.0
+
+        self.setFont(QFont("Consolas", 10))
+        self.setStyleSheet("background-color: rgba(0, 0, 0, 170); color: #9effa0; padding: 8px;"
+                           "border-radius: 6px;")
+        self.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.move(10, 10)
+        self.hide()
+
+    @property
+    def active(self):
+        return self.timer is not None
+
+    def show_hud(self):
+        self.timer = StageTimer(window=self.window)
+        self.shown_at.clear()
+        self.last_refresh = 0.0
+        self.setText("...")
+        self.adjustSize()
+        self.show()
+        self.raise_()
+
+    def hide_hud(self):
+        self.timer = None
+        self.hide()
+
+    def frame_shown(self):
+        self.shown_at.append(time.perf_counter())
+
+    def fps(self):
+        if len(self.shown_at) < 2:
+            return 0.0
+        span = self.shown_at[-1] - self.shown_at[0]
+        return (len(self.shown_at) - 1) / span if span > 0 else 0.0
+
+    def refresh(self, backend, device, reader, inference, clock, analyzer):
+        now = time.perf_counter()
+        if now - self.last_refresh < self.refresh_s:
+            return
+        self.last_refresh = now
+
+        reader_metrics = reader.metrics()
+        inference_metrics = inference.metrics()
+        clock_metrics = clock.metrics()
+        lines = [
+            f"FPS        {self.fps():6.1f}",
+            f"backend    {backend} / {device}",
+            f"decode q   {reader_metrics['depth']:>3}/{reader_metrics['capacity']}"
+            f"   infer q {inference_metrics['pending']}",
+            f"dropped    show {clock_metrics['dropped_display']}, analysis {clock_metrics['dropped_analysis']}",
+            "",
+        ]
+        for stage in STAGES:
+            mean = self.timer.mean(stage)
+            if mean is not None:
+                lines.append(f"{stage:<12} {mean:7.2f} ms")
+        lines.append("")
+        for event in ("shot", "foul"):
+            latency = analyzer.db_latency_ms.get(event)
+            lines.append(f"db {event:<8} {f'{latency:7.1f} ms' if latency is not None else '      -'}")
+
+        self.setText("\n".join(lines))
+        self.adjustSize()
@@ -0,0 +1,92 @@
+import time
+
+
+WAIT = "wait"
+SHOW = "show"
+ANALYZE_ONLY = "analyze_only"
+
+
+class PlaybackClock:
+    """Presentation clock that schedules frames by their video timestamps against wall-clock time.
+
+    drops() is asked before a decoded frame goes to the models: a frame
+    more than drop_ms behind is skipped entirely, without inference or
+    analysis (drop_ms=None never skips). decide() then tells the caller
+    what to do with an inferred frame: WAIT while it is early, SHOW when
+    it is due and ANALYZE_ONLY when it is more than late_ms behind (the
+    frame still goes through the analyzer but is not drawn). If playback
+    falls more than resync_ms behind, dropping is not catching up, so the
+    clock re-anchors to the current frame and shows it.
+    """
+
+    def __init__(self, rate=1.0, late_ms=40.0, drop_ms=250.0, resync_ms=1000.0):
+        self.rate = rate
+        self.late_ms = late_ms
+        self.drop_ms = drop_ms
+        self.resync_ms = resync_ms
+        self.anchor_wall = None
+        self.anchor_media = 0.0
+
+        self.shown = 0
+        self.late = 0
+        self.dropped_display = 0
+        self.dropped_analysis = 0
+        self.resyncs = 0
+        self.max_lateness_ms = 0.0
+
+    def reset(self):
+        """Forget the anchor; the next frame passed to decide() is shown at once and starts the clock."""
+        self.anchor_wall = None
+
+    def start(self, media_ms):
+        self.anchor_wall = time.perf_counter()
+        self.anchor_media = media_ms
+
+    def lateness_ms(self, media_ms):
+        """How far wall-clock time is past the moment the frame should have been shown (negative if early)."""
+        elapsed = (time.perf_counter() - self.anchor_wall) * 1000.0 * self.rate
+        return (elapsed - (media_ms - self.anchor_media)) / self.rate
+
+    def drops(self, media_ms):
+        """True if a decoded frame is too late to be worth inferring; it is counted as dropped."""
+        if self.anchor_wall is None or self.drop_ms is None:
+            return False
+        lateness = self.lateness_ms(media_ms)
+        # Дальше resync_ms кадр не выбрасываем: decide() переякорит часы на нём
+        if not self.drop_ms < lateness <= self.resync_ms:
+            return False
+        self.late += 1
+        self.max_lateness_ms = max(self.max_lateness_ms, lateness)
+        self.dropped_analysis += 1
+        return True
+
+    def decide(self, media_ms):
+        if self.anchor_wall is None:
+            self.start(media_ms)
+        lateness = self.lateness_ms(media_ms)
+        if lateness < 0:
+            return WAIT
+
+        if lateness <= self.late_ms:
+            self.shown += 1
+            return SHOW
+
+        self.late += 1
+        self.max_lateness_ms = max(self.max_lateness_ms, lateness)
+        if lateness > self.resync_ms:
+            self.resyncs += 1
+            self.start(media_ms)
+            self.shown += 1
+            return SHOW
+        self.dropped_display += 1
+        return ANALYZE_ONLY
+
+    def metrics(self):
+        return {
+            "shown": self.shown,
+            "late": self.late,
+            "dropped_display": self.dropped_display,
+            "dropped_analysis": self.dropped_analysis,
+            "resyncs": self.resyncs,
+            "max_lateness_ms": self.max_lateness_ms,
+        }
@@ -0,0 +1,77 @@
+import numpy as np
+
+
+POSITION_DTYPE = np.dtype([
+    ("x", np.int32),
+    ("y", np.int32),
+    ("frame", np.int64),
+    ("w", np.int32),
+    ("h", np.int32),
+    ("conf", np.float32),
+    ("measured", np.bool_),
+])
+
+
+class PositionBuffer:
+    """Fixed-capacity ring buffer of detections (x, y, frame, w, h, conf, measured), oldest first.
+
+    Every record is written twice, at i and i + capacity, so the live
+    window is always one contiguous slice and view() is a zero-copy
+    structured array (view()["y"] gives the y column, and so on). Append,
+    pop from either end and expiry by frame number are O(1) / O(log n).
+    When full, appending drops the oldest record.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = np.zeros(2 * capacity, dtype=POSITION_DTYPE)
+        self.head = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def view(self):
+        return self.data[self.head:self.head + self.size]
+
+    def append(self, x, y, frame, w, h, conf, measured=True):
+        if self.size == self.capacity:
+            self.popleft()
+        i = (self.head + self.size) % self.capacity
+        record = (x, y, frame, w, h, conf, measured)
+        self.data[i] = record
+        self.data[i + self.capacity] = record
+        self.size += 1
+
+    def pop(self):
+        """Drop the newest record."""
+        if self.size:
+            self.size -= 1
+
+    def popleft(self):
+        """Drop the oldest record."""
+        if self.size:
+            self.head = (self.head + 1) % self.capacity
+            self.size -= 1
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+
+    def expire_before(self, frame):
+        """Drop records older than the given frame number (records are appended in frame order)."""
+        drop = int(np.searchsorted(self.view()["frame"], frame, side="left"))
+        self.head = (self.head + drop) % self.capacity
+        self.size -= drop
+
+    def center(self, i=-1):
+        record = self.data[self.head + (i % self.size)]
+        return int(record["x"]), int(record["y"])
+
+    def box(self, i=-1):
+        """(x, y, w, h) of a record as Python ints, the newest one by default."""
+        record = self.data[self.head + (i % self.size)]
+        return int(record["x"]), int(record["y"]), int(record["w"]), int(record["h"])
+
+    def frame(self, i=-1):
+        return int(self.data[self.head + (i % self.size)]["frame"])
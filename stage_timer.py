@@ -0,0 +1,65 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+
+# Этапы обработки кадра в порядке конвейера
+STAGES = ("decode", "infer_object", "infer_person", "detections", "teams", "tracking", "fouls", "shots", "overlay",
+          "qt")
+
+
+class StageTimer:
+    """Per-frame durations of the pipeline stages, kept as milliseconds per stage.
+
+    Producers on any thread call add(stage, seconds), or since(stage, start)
+    which also returns the new start time for the next stage. With
+    window=None every sample is kept (benchmarks); with a window only the
+    last `window` samples per stage are (live display).
+    """
+
+    def __init__(self, window=None):
+        self.window = window
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds, count=1):
+        """Record `count` frames that took `seconds` each in the given stage."""
+        ms = 1000.0 * seconds
+        with self.lock:
+            samples = self.samples[stage]
+            for _ in range(count):
+                samples.append(ms)
+
+    def since(self, stage, start):
+        now = time.perf_counter()
+        self.add(stage, now - start)
+        return now
+
+    def last(self, stage):
+        with self.lock:
+            samples = self.samples.get(stage)
+            return samples[-1] if samples else None
+
+    def mean(self, stage):
+        with self.lock:
+            samples = self.samples.get(stage)
+            return sum(samples) / len(samples) if samples else None
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        """{stage: {count, mean, p50, p95, p99}} in ms, pipeline stages first."""
+        with self.lock:
+            data = {stage: np.array(samples) for stage, samples in self.samples.items() if samples}
+        order = [s for s in STAGES if s in data] + sorted(s for s in data if s not in STAGES)
+        summary = {}
+        for stage in order:
+            values = data[stage]
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            summary[stage] = {"count": int(len(values)), "mean": float(values.mean()),
+                              "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+        return summary
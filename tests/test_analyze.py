@@ -0,0 +1,31 @@
+from analyze import merge_segment_events
+
+
+def event(kind, frame, team, segment, owned):
+    return {"type": kind, "frame": frame, "team": team, "segment": segment, "owned": owned}
+
+
+def test_close_distinct_events_from_neighbouring_segments_are_kept():
+    segments = [
+        {"events": [event("foul", 980, "x", 0, True)]},
+        {"events": [event("foul", 1060, "y", 1000, True)]},
+    ]
+    merged = merge_segment_events(segments, dedupe_frames=100)
+    assert [(e["frame"], e["team"]) for e in merged] == [(980, "x"), (1060, "y")]
+
+
+def test_owned_events_of_the_same_team_are_not_collapsed():
+    segments = [
+        {"events": [event("shot", 990, "x", 0, True)]},
+        {"events": [event("shot", 1005, "x", 1000, True)]},
+    ]
+    assert len(merge_segment_events(segments, dedupe_frames=30)) == 2
+
+
+def test_copy_past_segment_end_is_replaced_by_the_owned_event():
+    segments = [
+        {"events": [event("shot", 1004, "x", 0, False)]},
+        {"events": [event("shot", 1010, "x", 1000, True)]},
+    ]
+    merged = merge_segment_events(segments, dedupe_frames=30)
+    assert len(merged) == 1 and merged[0]["owned"] and merged[0]["frame"] == 1010
@@ -0,0 +1,116 @@
+from collections import deque
+
+import numpy as np
+import torch
+
+from frame_reader import DecodedFrame
+from detection_cache import DetectionCache
+from hoop_lock import HoopLock
+from inference import BALL_CLASS, BatchInference
+
+
+HOOP_CLASS = 1
+HOOP_BOX = (100.0, 100.0, 20.0, 20.0)
+
+
+class FakeReader:
+    def __init__(self, count, shape=(240, 320, 3)):
+        self.frames = deque(DecodedFrame(i, i * 40.0, np.zeros(shape, np.uint8)) for i in range(count))
+
+    def read(self, timeout=0.0):
+        return self.frames.popleft() if self.frames else None
+
+    def finished(self):
+        return not self.frames
+
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.boxes = FakeBoxes(data)
+
+
+class StickyModel:
+    """Keeps predict arguments between calls like an ultralytics predictor does."""
+
+    def __init__(self, rows):
+        self.rows = torch.tensor(rows, dtype=torch.float32).reshape(-1, 6)
+        self.args = {}
+        self.calls = []
+
+    def __call__(self, images, **kwargs):
+        self.args.update(kwargs)
+        self.calls.append(dict(kwargs))
+        classes = self.args.get("classes")
+        rows = self.rows
+        if classes is not None:
+            rows = rows[torch.isin(rows[:, 5], torch.tensor(classes, dtype=torch.float32))]
+        return [FakeResult(rows.clone()) for _ in images]
+
+
+def object_model():
+    cx, cy, w, h = HOOP_BOX
+    return StickyModel([[cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2, 0.9, HOOP_CLASS],
+                        [10, 10, 20, 20, 0.8, BALL_CLASS]])
+
+
+def feed(lock, decoded, detections_obj):
+    """Pass a frame's hoop boxes to the lock the way MatchAnalyzer.process_frame does."""
+    hoops = [((x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1, conf)
+             for x1, y1, x2, y2, conf, cls in detections_obj if cls == HOOP_CLASS]
+    lock.update(decoded.image, hoops, decoded.index)
+
+
+def test_revalidation_batch_sees_hoop_after_ball_only_batch(tmp_path):
+    model_object, model_person = object_model(), StickyModel([])
+    lock = HoopLock(str(tmp_path / "match.mp4"), revalidate_every=3)
+    lock.box, lock.frame_size = HOOP_BOX, (320, 240)
+    inference = BatchInference(FakeReader(4), model_object, model_person, "cpu", batch_size=2, hoop_lock=lock)
+
+    batches = []
+    for _ in range(2):
+        batch = [inference.next() for _ in range(2)]
+        for decoded, detections_obj, _ in batch:
+            feed(lock, decoded, detections_obj)
+        batches.append(batch)
+
+    assert model_object.calls[0]["classes"] == [BALL_CLASS]
+    assert model_object.calls[1]["classes"] is None
+    assert all(not (d[:, 5] == HOOP_CLASS).any() for _, d, _ in batches[0])
+    assert all((d[:, 5] == HOOP_CLASS).any() for _, d, _ in batches[1])
+    assert lock.locked and lock.failures == 0
+
+
+def test_cached_ball_only_frames_keep_the_lock(tmp_path):
+    video, weights = tmp_path / "match.mp4", tmp_path / "weights.pt"
+    video.write_bytes(b"video")
+    weights.write_bytes(b"weights")
+    frames = 20
+
+    def session(revalidate_every):
+        model_object, model_person = object_model(), StickyModel([])
+        lock = HoopLock(str(video), revalidate_every=revalidate_every, max_failures=2)
+        cache = DetectionCache(str(video), frames, [str(weights)], {"hoop_lock": True})
+        inference = BatchInference(FakeReader(frames), model_object, model_person, "cpu", hoop_lock=lock,
+                                   cache=cache)
+        for _ in range(frames):
+            decoded, detections_obj, _ = inference.next()
+            feed(lock, decoded, detections_obj)
+        inference.close()
+        return lock, model_object
+
+    lock = HoopLock(str(video))
+    lock.box, lock.frame_size = HOOP_BOX, (320, 240)
+    lock.save()
+
+    first_lock, first_model = session(3)
+    # Другой шаг проверки: проверки второго сеанса выпадают на кадры, где первый искал только мяч
+    second_lock, second_model = session(4)
+    assert first_lock.locked and second_lock.locked
+    assert second_lock.failures == 0
+    # Заново прогоняются только кадры, где кэш хранит лишь мяч, а кольцо нужно проверить
+    assert len(second_model.calls) < len(first_model.calls)
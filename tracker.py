@@ -0,0 +1,98 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+
+class PlayerTracker:
+    """Multi-object tracker for the players of one team.
+
+    Track state lives in flat numpy arrays (position, velocity, hits,
+    misses). Each update predicts every live track one step ahead with
+    a constant-velocity model, builds the track/detection distance matrix
+    at once and solves the assignment optimally (Hungarian). Matches
+    farther than max_distance are rejected. An unmatched detection starts
+    a track, which is confirmed after min_hits matches. A track missed
+    for more than max_misses frames (or a tentative track missed once) is
+    retired, and its ID is freed for reuse.
+    """
+
+    def __init__(self, max_distance=50.0, min_hits=1, max_misses=15, velocity_smoothing=0.5, capacity=16):
+        self.max_distance = max_distance
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.velocity_smoothing = velocity_smoothing
+
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.pos = np.zeros((capacity, 2), dtype=np.float64)
+        self.vel = np.zeros((capacity, 2), dtype=np.float64)
+        self.hits = np.zeros(capacity, dtype=np.int64)
+        self.misses = np.zeros(capacity, dtype=np.int64)
+
+    def _grow(self):
+        extra = len(self.alive)
+        self.alive = np.concatenate([self.alive, np.zeros(extra, dtype=bool)])
+        self.ids = np.concatenate([self.ids, np.zeros(extra, dtype=np.int64)])
+        self.pos = np.concatenate([self.pos, np.zeros((extra, 2))])
+        self.vel = np.concatenate([self.vel, np.zeros((extra, 2))])
+        self.hits = np.concatenate([self.hits, np.zeros(extra, dtype=np.int64)])
+        self.misses = np.concatenate([self.misses, np.zeros(extra, dtype=np.int64)])
+
+    def _birth(self, center):
+        free = np.flatnonzero(~self.alive)
+        if not len(free):
+            self._grow()
+            free = np.flatnonzero(~self.alive)
+        slot = free[0]
+        used = set(self.ids[self.alive].tolist())
+        track_id = next(i for i in range(1, len(used) + 2) if i not in used)
+
+        self.alive[slot] = True
+        self.ids[slot] = track_id
+        self.pos[slot] = center
+        self.vel[slot] = 0.0
+        self.hits[slot] = 1
+        self.misses[slot] = 0
+        return slot
+
+    def update(self, detected):
+        """Feed this frame's detections [(center, bbox, color)]; return {track_id: (center, color)} of matched tracks."""
+        slots = np.flatnonzero(self.alive)
+        predicted = self.pos[slots] + self.vel[slots]
+        centers = np.array([c for c, _, _ in detected], dtype=np.float64).reshape(-1, 2)
+
+        matched_slots = {}
+        if len(slots) and len(centers):
+            cost = np.linalg.norm(predicted[:, None, :] - centers[None, :, :], axis=2)
+            # Недопустимые пары получают заведомо большую цену, чтобы не мешать оптимальному назначению
+            gated = np.where(cost < self.max_distance, cost, self.max_distance * 1e3)
+            rows, cols = linear_sum_assignment(gated)
+            for r, c in zip(rows, cols):
+                if cost[r, c] < self.max_distance:
+                    matched_slots[c] = slots[r]
+
+        matched = np.zeros(len(self.alive), dtype=bool)
+        for det, slot in matched_slots.items():
+            a = self.velocity_smoothing
+            self.vel[slot] = a * (centers[det] - self.pos[slot]) + (1 - a) * self.vel[slot]
+            self.pos[slot] = centers[det]
+            self.hits[slot] += 1
+            self.misses[slot] = 0
+            matched[slot] = True
+
+        missed = self.alive & ~matched
+        self.misses[missed] += 1
+        self.pos[missed] += self.vel[missed]
+        dead = missed & ((self.misses > self.max_misses) | (self.hits < self.min_hits))
+        self.alive[dead] = False
+
+        visible = {}
+        for det, (center, _, color) in enumerate(detected):
+            slot = matched_slots.get(det)
+            if slot is None:
+                slot = self._birth(center)
+            if self.hits[slot] >= self.min_hits:
+                visible[int(self.ids[slot])] = (center, color)
+        return visible
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))